@@ -12,9 +12,12 @@ backtester.py — KRA 경마 분석기 백테스팅 및 파라미터 튜닝 모
     python backtester.py --tune
 """
 import argparse
+import functools
 import itertools
+import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import pandas as pd
@@ -37,6 +40,38 @@ if sys.stderr.encoding.lower() != 'utf-8':
 console = Console()
 
 
+# 경주별 백테스트 결과 컬럼 (run()의 누적 순서와 동일)
+RESULT_COLS = (
+    "date", "race_no", "horse", "pred_score", "actual_rank",
+    "is_hit", "is_win_hit", "win_return", "is_qui_hit", "qui_return",
+    "is_trio_hit", "trio_return", "is_veto",
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _resolve_col(columns: tuple, candidates: tuple, ignore_case: bool = False):
+    """후보 컬럼명 중 실제 컬럼 반환 (컬럼 구성별 캐시, 없으면 None)"""
+    if ignore_case:
+        # 소문자 후보와 비교, 컬럼 순서상 첫 매칭
+        return next((c for c in columns if c.lower() in candidates), None)
+    return next((c for c in candidates if c in columns), None)
+
+
+def _resolve_workers(n_jobs: int) -> int:
+    """병렬 프로세스 수 확인 (-1=CPU 코어 수, 그 외에는 1 이상만 허용)"""
+    if n_jobs == -1:
+        return os.cpu_count() or 1
+    if n_jobs < 1:
+        raise ValueError(f"n_jobs는 1 이상 또는 -1이어야 합니다: {n_jobs}")
+    return n_jobs
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_analyzer(params_key: str) -> QuantitativeAnalyzer:
+    """파라미터 조합(JSON 키)별 분석기 재사용 (분석기는 호출 간 상태 없음)"""
+    return QuantitativeAnalyzer(**json.loads(params_key))
+
+
 class Backtester:
     """백테스팅 엔진"""
 
@@ -45,221 +80,193 @@ class Backtester:
         # [NEW] AI Analyst
         self.ai_analyst = AIAnalyst()
         self.output_dir = os.path.join(config.DATA_DIR, "backtest_results")
+        # 디버그 출력 여부 (기본 off — 경주/마필 단위 print가 루프 시간을 크게 차지함)
+        self.verbose = False
+        # 캐시를 지우고 다시 수집할 날짜 (YYYYMMDD, 심판 리포트 등 누락된 날짜 재수집용 — 1회 적용)
+        self.refresh_dates = set()
         os.makedirs(self.output_dir, exist_ok=True)
 
     def _generate_demo_data(self, date: str, meet: str) -> dict:
-        """데모용 가상 데이터 생성"""
-        import random
+        """데모용 가상 데이터 생성 (numpy 일괄 샘플링)"""
+        rng = np.random.default_rng()
         data = {}
-        entries_list = []
-        results_list = []
-        training_list = []
-        
-        for race_no in range(1, 11):
-            num_horses = random.randint(8, 12)
-            rank_pool = list(range(1, num_horses + 1))
-            random.shuffle(rank_pool)
-            
-            for i in range(num_horses):
-                hr_no = i + 1
-                hr_name = f"가상마{race_no}_{hr_no}"
-                
-                # 출전표
-                entry = {
-                    "rcNo": race_no, "hrNo": hr_no, "hrName": hr_name,
-                    "jkName": f"기수{random.randint(1,50)}",
-                    "trName": f"조교사{random.randint(1,30)}",
-                    "rating": random.randint(20, 100),
-                    "wgHr": random.randint(450, 550),
-                }
-                # 가상 과거 기록 (API 스키마 모방)
-                for h_idx in range(1, 6):
-                    entry[f"s1f_{h_idx}"] = random.uniform(13.0, 14.5)
-                    entry[f"g1f_{h_idx}"] = random.uniform(12.0, 14.0)
-                    entry[f"ord_{h_idx}"] = str(random.randint(1, 14))
-                    entry[f"pos_{h_idx}"] = random.choice(["1-1", "2-2", "8-7", "5-5"])
-                    entry[f"wg_{h_idx}"] = random.randint(450, 520)
-                
-                entries_list.append(entry)
 
-                # 경주 결과
-                results_list.append({
-                    "rcNo": race_no, "hrName": hr_name, "ord": rank_pool[i]
-                })
-
-                # 조교
-                if random.random() > 0.5:
-                    training_list.append({
-                        "hrName": hr_name, "trType": "강",
-                        "runCount": random.randint(10, 30), "trDate": date
-                    })
+        race_nos = np.arange(1, 11)
+        num_horses = rng.integers(8, 13, size=len(race_nos))
+        n_total = int(num_horses.sum())
+
+        rc_no = np.repeat(race_nos, num_horses)
+        hr_no = np.concatenate([np.arange(1, n + 1) for n in num_horses])
+        hr_name = [f"가상마{r}_{h}" for r, h in zip(rc_no, hr_no)]
+
+        # 출전표
+        entries = {
+            "rcNo": rc_no, "hrNo": hr_no, "hrName": hr_name,
+            "jkName": [f"기수{k}" for k in rng.integers(1, 51, n_total)],
+            "trName": [f"조교사{k}" for k in rng.integers(1, 31, n_total)],
+            "rating": rng.integers(20, 101, n_total),
+            "wgHr": rng.integers(450, 551, n_total),
+        }
+        # 가상 과거 기록 (API 스키마 모방)
+        for h_idx in range(1, 6):
+            entries[f"s1f_{h_idx}"] = rng.uniform(13.0, 14.5, n_total)
+            entries[f"g1f_{h_idx}"] = rng.uniform(12.0, 14.0, n_total)
+            entries[f"ord_{h_idx}"] = rng.integers(1, 15, n_total).astype(str)
+            entries[f"pos_{h_idx}"] = rng.choice(["1-1", "2-2", "8-7", "5-5"], n_total)
+            entries[f"wg_{h_idx}"] = rng.integers(450, 521, n_total)
+
+        # 경주 결과 (경주별 무작위 착순)
+        ranks = np.concatenate([rng.permutation(n) + 1 for n in num_horses])
+
+        # 조교 (절반 정도 마필만)
+        trained = rng.random(n_total) > 0.5
+        n_trained = int(trained.sum())
+
+        data["entries"] = pd.DataFrame(entries)
+        data["results"] = pd.DataFrame({"rcNo": rc_no, "hrName": hr_name, "ord": ranks})
+        data["training"] = pd.DataFrame({
+            "hrName": np.array(hr_name)[trained], "trType": ["강"] * n_trained,
+            "runCount": rng.integers(10, 31, n_trained), "trDate": [date] * n_trained
+        })
+        return data
 
-        data["entries"] = pd.DataFrame(entries_list)
-        data["results"] = pd.DataFrame(results_list)
-        data["training"] = pd.DataFrame(training_list)
+    def _parse_weights(self, df, wg_col):
+        """경주 단위 마체중 일괄 파싱: 480(10) -> 480, 10 (파싱 불가 시 0, 0)"""
+        if not wg_col:
+            zeros = np.zeros(len(df))
+            return zeros, zeros
+
+        parts = df[wg_col].astype(str).str.extract(r'^\s*(?P<val>[-+]?\d+(?:\.\d+)?)\s*(?:\((?P<diff>[^)]*)\))?')
+        weights = pd.to_numeric(parts["val"], errors="coerce")
+        # 변동폭 파싱 (체중 값이 없으면 변동폭도 무시)
+        diffs = pd.to_numeric(parts["diff"], errors="coerce").where(weights.notna())
+        return weights.fillna(0.0).to_numpy(), diffs.fillna(0.0).to_numpy()
+
+    def _load_date_data(self, date: str, meet: str) -> dict:
+        """날짜별 데이터 로드 (캐시 우선, 없으면 수집). 수집 실패 시 None"""
+        if hasattr(self, 'demo_mode') and self.demo_mode:
+            return self._generate_demo_data(date, meet)
+
+        data = self.scraper.load_cache(date, meet)
+        # [Fix] If entries missing (deleted), force collect_all
+        if not data or "entries" not in data or data["entries"] is None:
+            try:
+                data = self.scraper.collect_all(date, meet)
+            except Exception as e:
+                return None
         return data
 
-    def _parse_weight(self, weight_str):
-        if not weight_str: return 0.0, 0.0
-        try:
-            # 480(10) -> 480, 10
-            s = str(weight_str)
-            val_str = s.split('(')[0]
-            
-            # 변동폭 파싱
-            diff = 0.0
-            if '(' in s and ')' in s:
-                diff_str = s.split('(')[1].replace(')', '')
-                try:
-                    diff = float(diff_str)
-                except:
-                    diff = 0.0
-            
-            # 빈 문자열 처리
-            if not val_str.strip(): return 0.0, 0.0
-            return float(val_str), diff
-        except:
-            return 0.0, 0.0
+    def _get_date_data(self, date: str, meet: str, preloaded: dict = None) -> dict:
+        """미리 로드된 데이터가 있으면 사용, 없으면 로드/수집"""
+        if preloaded is not None and date in preloaded:
+            return preloaded[date]
+        return self._load_date_data(date, meet)
+
+    def _invalidate_refresh_dates(self, dates, meet: str):
+        """refresh_dates에 지정된 날짜의 출전표 캐시 삭제 → 다음 로드 시 재수집 (날짜별 1회)"""
+        for date in self.refresh_dates.intersection(dates):
+            for ext in (".parquet", ".csv"):
+                cache_path = os.path.join(config.DATA_DIR, f"{date}_{meet}", "entries" + ext)
+                if os.path.exists(cache_path):
+                    try:
+                        os.remove(cache_path)
+                        console.print(f"[dim]🔄 {date} 캐시 삭제 (재수집 예정)[/dim]")
+                    except OSError:
+                        pass
+            self.refresh_dates.discard(date)
 
-    def run(self, start_date: str, end_date: str, meet: str = "1",
-            params: dict = None) -> dict:
-        """
-        지정된 기간 동안 백테스팅 수행.
+    def prefetch(self, start_date: str, end_date: str, meet: str = "1") -> dict:
+        """기간 내 데이터를 1회만 로드 ({date: data}, 튜닝 반복 간 재사용)"""
+        dates = self._generate_dates(start_date, end_date)
+        self._invalidate_refresh_dates(dates, meet)
+        return {date: self._load_date_data(date, meet)
+                for date in track(dates, description="Loading Data...")}
 
-        Args:
-            start_date: 시작일 (YYYYMMDD)
-            end_date: 종료일 (YYYYMMDD)
-            meet: 경마장 코드
-            params: 분석기 파라미터 (튜닝용)
+    def _simulate_date(self, date, data, analyzer):
+        """
+        하루치 데이터 시뮬레이션 (공유 상태 없음 — 워커 프로세스에서도 호출)
 
         Returns:
-            dict — 성과 지표 (적중률, ROI 등)
+            (컬럼별 결과 리스트, VETO 통계, W 보너스 통계)
         """
-        console.print(f"\n[bold magenta]🧪 백테스팅 시작 ({start_date} ~ {end_date})[/bold magenta]")
-        if params:
-            console.print(f"[dim]파라미터: {params}[/dim]")
-
-        # 날짜 리스트 생성 (주말만 체크)
-        dates = self._generate_dates(start_date, end_date)
-        
-        results = []
-        veto_stats = {"total": 0, "failed": 0}  # VETO된 마필 중 실제 입상 실패 비율
-        w_bonus_stats = {"total": 0, "hit": 0}  # W 보너스 받은 마필 중 입상 비율
-
-        analyzer = QuantitativeAnalyzer(**(params or {}))
-
-        for date in track(dates, description="Running Simulation..."):
-            # 1. 데이터 로드 (없으면 수집)
-            # [Debug] Force fresh scrape for 20260215 to get steward reports
-            if date == "20260215":
-                cache_path = os.path.join(config.DATA_DIR, f"{date}_{meet}", "entries.csv")
-                if os.path.exists(cache_path):
-                    try:
-                        os.remove(cache_path)
-                        print(f"  [Debug] Deleted cache for {date} to force refresh.")
-                    except: pass
+        results = {col: [] for col in RESULT_COLS}
+        veto_stats = {"total": 0, "failed": 0}
+        w_bonus_stats = {"total": 0, "hit": 0}
 
-            if hasattr(self, 'demo_mode') and self.demo_mode:
-                data = self._generate_demo_data(date, meet)
-            else:
-                data = self.scraper.load_cache(date, meet)
-                # [Fix] If entries missing (deleted), force collect_all
-                if not data or "entries" not in data or data["entries"] is None:
-                    try:
-                        data = self.scraper.collect_all(date, meet)
-                    except Exception as e:
-                        continue
+        entries = data.get("entries")
+        race_results = data.get("results")
 
-            entries = data.get("entries")
-            race_results = data.get("results")
-            
-            # [Debug] Check data size
+        # [Debug] Check data size
+        if self.verbose:
             if entries is not None:
                 print(f"  [Debug] Entries: {len(entries)}")
             else:
-                 print(f"  [Debug] Entries is None!")
-                 
+                print(f"  [Debug] Entries is None!")
+
             if race_results is not None:
                 print(f"  [Debug] Results: {len(race_results)}")
             else:
                 print(f"  [Debug] Results is None!")
-            training = data.get("training")
-
-            if entries is None or entries.empty or race_results is None or race_results.empty:
+        # 조교 데이터는 날짜 단위로 마명 인덱스 생성 (마필마다 전체 필터링 방지)
+        training_by_name = self._index_training(data.get("training"))
+
+        if entries is None or entries.empty or race_results is None or race_results.empty:
+            return results, veto_stats, w_bonus_stats
+
+        # 2. 시뮬레이션
+        # 경주번호별 그룹핑
+        race_groups = self._group_by_race(entries)
+        hist_cols = self._resolve_history_cols(entries.columns)
+        # 마명/마체중 컬럼은 날짜(출전표) 단위로 1회만 결정
+        entry_cols = tuple(entries.columns)
+        name_col = _resolve_col(entry_cols, ("hrName", "hr_name", "마명"))
+        wg_col = _resolve_col(entry_cols, ("wgHr", "weight"))
+
+        for race_no, idx in race_groups.items():
+            group_df = entries.iloc[idx]
+            # 해당 경주의 결과(정답) 찾기
+            actual_ranks, rank_to_name = self._get_actual_ranks(race_no, race_results)
+            if not actual_ranks:
                 continue
 
-            # 2. 시뮬레이션
-            # 경주번호별 그룹핑
-            race_groups = self._group_by_race(entries)
-            
-            for race_no, group_df in race_groups.items():
-                # 해당 경주의 결과(정답) 찾기
-                actual_ranks = self._get_actual_ranks(race_no, race_results)
-                if not actual_ranks:
-                    continue
-
-                sim_results = []
-                for _, row in group_df.iterrows():
-                    horse_name = str(row.get("hrName", row.get("hr_name", row.get("마명", "?"))))
-                    
-                    # 과거 기록 구성 (Simulation Logic)
-                    # 주의: backtesting 시점 기준 과거 데이터만 사용해야 함
-                    # fetch_race_entries 결과에는 '직전 경주' 정보가 포함됨
-                    history = self._build_history(row)
-                    train_recs = self._build_training(horse_name, training)
-                    weight, weight_diff = self._parse_weight(row.get("wgHr", row.get("weight", 0)))
-
-                    # Steward Reports 구성
-                    st_reports = []
-                    # steward_report_1은 enrichment 단계에서 추가됨
-                    if "steward_report_1" in row and row["steward_report_1"]:
-                        # 1전 날짜 가져오기
-                        rpt_date = str(row.get("rcDate_1", ""))
-                        st_reports.append({
-                            "date": rpt_date,
-                            "report": str(row["steward_report_1"])
-                        })
-
-                    analysis = analyzer.analyze_horse(
-                        horse_name, history, train_recs, weight, weight_diff,
-                        steward_reports=st_reports
-                    )
-                    
-                    # [NEW] AI Qualitative Check (Gemini Flash)
-                    # If quantitative analysis flags it as 'Dark Horse' OR if there are steward reports
-                    ai_bad_luck = False
-                    ai_reason = ""
-                    
-                    if st_reports and self.ai_analyst:
-                        # Only check if potential dark horse or just check all with reports?
-                        # To save cost/time, maybe check only if 'interference_count' > 0 from keyword search?
-                        # Or check all to find missed cases? User wants "Flash" for backtesting, so let's try.
-                        # For speed, let's check if keyword search found SOMETHING or if we want to be thorough.
-                        # Let's check top 1 report.
-                        
-                        # [Optimization] Only call AI if keyword search found something OR randomly (to test)
-                        # For now, strictly verify Keyword Search results + uncover false negatives?
-                        # Let's just run it for all with reports for this verification run.
-                        
-                        rpt_text = st_reports[0]['report']
-                        ai_result = self.ai_analyst.analyze_bad_luck(horse_name, rpt_text)
-                        
-                        # Parse simplified result (assuming string provided by my mock or actual API)
-                        if "true" in str(ai_result).lower():
-                            ai_bad_luck = True
-                            ai_reason = f"[AI] {ai_result}"[:100]
-
-                    analysis = analyzer.analyze_horse(
-                        horse_name, history, train_recs, weight, weight_diff,
-                        steward_reports=st_reports
-                    )
-                    
-                    # Merge AI Result
-                    if ai_bad_luck:
-                        analysis['dark_horse'] = True
-                        analysis['dark_horse_reason'] = f"{analysis.get('dark_horse_reason','')} | {ai_reason}"
-                        analysis['interference_score'] += 20 # Bonus for AI confirmed bad luck
-                    
+            sim_results = []
+            weights, weight_diffs = self._parse_weights(group_df, wg_col)
+            # iterrows의 행별 Series 생성 대신 dict 레코드로 순회
+            records = group_df.to_dict("records")
+            names = [str(v) for v in group_df[name_col]] if name_col else ["?"] * len(records)
+            reports = [self._build_steward_reports(row) for row in records]
+
+            # [NEW] AI Qualitative Check (Gemini Flash)
+            # 리포트가 있는 마필 전체를 경주 단위로 모아 동시 요청 (마필별 순차 RTT 제거)
+            ai_results = self._batch_bad_luck(names, reports)
+
+            for row, horse_name, st_reports, ai_result, weight, weight_diff in zip(
+                    records, names, reports, ai_results, weights, weight_diffs):
+                # 과거 기록 구성 (Simulation Logic)
+                # 주의: backtesting 시점 기준 과거 데이터만 사용해야 함
+                # fetch_race_entries 결과에는 '직전 경주' 정보가 포함됨
+                history = self._build_history(row, hist_cols)
+                train_recs = training_by_name.get(horse_name, [])
+
+                ai_bad_luck = False
+                ai_reason = ""
+                # Parse simplified result (assuming string provided by my mock or actual API)
+                if ai_result is not None and "true" in str(ai_result).lower():
+                    ai_bad_luck = True
+                    ai_reason = f"[AI] {ai_result}"[:100]
+
+                analysis = analyzer.analyze_horse(
+                    horse_name, history, train_recs, weight, weight_diff,
+                    steward_reports=st_reports
+                )
+
+                # Merge AI Result
+                if ai_bad_luck:
+                    analysis['dark_horse'] = True
+                    analysis['dark_horse_reason'] = f"{analysis.get('dark_horse_reason','')} | {ai_reason}"
+                    analysis['interference_score'] += 20 # Bonus for AI confirmed bad luck
+
+                if self.verbose:
                     # [Debug] 리포트 전달 확인
                     if st_reports:
                         print(f"  [DEBUG] {horse_name} has {len(st_reports)} reports: {st_reports[0]['report'][:50]}...")
@@ -268,129 +275,189 @@ class Backtester:
                     if analysis.get("dark_horse") and analysis.get("interference_count", 0) > 0:
                         print(f"  [BadLuck] {horse_name} (R{row['rcNo']}) - {analysis['dark_horse_reason']}")
 
-                    sim_results.append(analysis)
+                sim_results.append(analysis)
 
-                # 순위 산정
-                ranked = analyzer.rank_horses(sim_results)
-                
-                # ---------------------------------------------------------
-                # [Strategy] 1축 - 2도전 - 3복병 (총 6두 선정)
-                # ---------------------------------------------------------
-                # 1. 축마 (Axis): 종합 점수 1위
-                axis_horse = ranked[0] # Best Score
-                is_veto = axis_horse["veto"]
-                
-                # 나머지 마필 리스트
-                others = ranked[1:]
-                
-                # 2. 복병마 (Dark Horses): is_dark_horse=True 인 말 중 상위 3두
-                #    (단, VETO된 말은 제외하거나 후순위)
-                dark_candidates = [h for h in others if h.get("is_dark_horse", False)]
-                dark_horses = dark_candidates[:3]
-                
-                # 3. 도전마 (Challengers): 복병마 제외한 나머지 중 상위 2두
-                remaining = [h for h in others if h not in dark_horses]
-                challengers = remaining[:2]
-                
-                # 복병마가 부족하면 나머지에서 채움 (총 3두)
-                if len(dark_horses) < 3:
-                    needed = 3 - len(dark_horses)
-                    # 이미 challenger로 뽑힌 애들 제외
-                    extras = [h for h in remaining if h not in challengers]
-                    dark_horses.extend(extras[:needed])
-                
-                # 최종 선정 (순서: 축1, 도전2, 복병3)
-                selected_horses = [axis_horse] + challengers + dark_horses
-                final_names = [h["horse_name"] for h in selected_horses]
-                
-                # ---------------------------------------------------------
-                # [Metrics] 적중률 계산 (Box 기준 아님, Strategy 기준)
-                # ---------------------------------------------------------
-                
-                # 정답 확인 (dict 반환)
-                horse_name = axis_horse["horse_name"]
-                actual_data = actual_ranks.get(horse_name, {"rank": 99, "winOdds": 0.0, "plcOdds": 0.0})
-                actual_rank = actual_data["rank"]
-                
-                # [DEBUG]
+            # 순위 산정
+            ranked = analyzer.rank_horses(sim_results)
+
+            # ---------------------------------------------------------
+            # [Strategy] 1축 - 2도전 - 3복병 (총 6두 선정)
+            # ---------------------------------------------------------
+            # 1. 축마 (Axis): 종합 점수 1위
+            axis_horse = ranked[0] # Best Score
+            is_veto = axis_horse["veto"]
+
+            # 나머지 마필 리스트
+            others = ranked[1:]
+
+            # 2. 복병마 (Dark Horses): is_dark_horse=True 인 말 중 상위 3두
+            #    (단, VETO된 말은 제외하거나 후순위)
+            #    (dict 비교 대신 others 내 인덱스로 분할)
+            dark_idx = [i for i, h in enumerate(others) if h.get("is_dark_horse", False)][:3]
+            dark_set = set(dark_idx)
+
+            # 3. 도전마 (Challengers): 복병마 제외한 나머지 중 상위 2두
+            remaining_idx = [i for i in range(len(others)) if i not in dark_set]
+            challengers = [others[i] for i in remaining_idx[:2]]
+
+            # 복병마가 부족하면 나머지에서 채움 (총 3두)
+            if len(dark_idx) < 3:
+                # 이미 challenger로 뽑힌 애들 제외
+                dark_idx += remaining_idx[2:2 + 3 - len(dark_idx)]
+            dark_horses = [others[i] for i in dark_idx]
+
+            # 최종 선정 (순서: 축1, 도전2, 복병3)
+            selected_horses = [axis_horse] + challengers + dark_horses
+            final_names = [h["horse_name"] for h in selected_horses]
+
+            # ---------------------------------------------------------
+            # [Metrics] 적중률 계산 (Box 기준 아님, Strategy 기준)
+            # ---------------------------------------------------------
+
+            # 정답 확인 (dict 반환)
+            horse_name = axis_horse["horse_name"]
+            actual_data = actual_ranks.get(horse_name, {"rank": 99, "winOdds": 0.0, "plcOdds": 0.0})
+            actual_rank = actual_data["rank"]
+
+            # [DEBUG]
+            if self.verbose:
                 print(f"  [Pick] 축:{axis_horse['horse_name']} 도:{[h['horse_name'] for h in challengers]} 복:{[h['horse_name'] for h in dark_horses]}")
                 if actual_rank <= 3:
-                     print(f"    -> 축마 적중! ({actual_rank}위)")
+                    print(f"    -> 축마 적중! ({actual_rank}위)")
+
+            # 1. 단승식 (Win) - 축마 기준
+            is_win_hit = actual_rank == 1
+            win_return = actual_data["winOdds"] if is_win_hit else 0.0
+
+            # 2. 연승식 (Place) - 축마 기준
+            is_plc_hit = actual_rank <= 3
+            plc_return = actual_data["plcOdds"] if is_plc_hit else 0.0
+
+            # 3. 복승식 (Quinella) - 축마 포함 + (도전+복병) 중 1두가 1,2위 구성
+            #    조합: Axis - {Any from Challengers + Dark}
+            is_qui_hit = False
+            qui_return = 0.0
+
+            # 실제 1, 2위 마명 찾기
+            r1_name = rank_to_name.get(1)
+            r2_name = rank_to_name.get(2)
+
+            # 내 픽 명단 (Axis, Challenger, DarkHub)
+            my_picks = {h["horse_name"] for h in selected_horses} # 총 6두 (set: O(1) 조회)
+
+            # 축마가 1,2위 안에 있고, 나머지 한 마리가 내 픽 안에 있으면 적중 (축 중심 베팅 가정)
+            if axis_horse["horse_name"] in [r1_name, r2_name]:
+                partner = r2_name if axis_horse["horse_name"] == r1_name else r1_name
+                if partner in my_picks:
+                    is_qui_hit = True
+                    qui_return = actual_data.get("qui_div", 0.0)
+
+            # 4. 삼복승식 (Trio) - 축마 포함 + 나머지 2두가 내 픽 안에 있음 (1,2,3위)
+            is_trio_hit = False
+            trio_return = 0.0
+            r3_name = rank_to_name.get(3)
+
+            rank_names = [r1_name, r2_name, r3_name]
+            if axis_horse["horse_name"] in rank_names:
+                # 축마 제외한 나머지 2마리 정답
+                needed_partners = [n for n in rank_names if n != axis_horse["horse_name"]]
+                # 내 픽(축 제외)과 교집합 확인
+                partners_in_picks = [n for n in needed_partners if n in my_picks]
+                if len(partners_in_picks) == 2:
+                    is_trio_hit = True # 축1 + 파트너2 적중 
+                    trio_return = actual_data.get("trio_div", 0.0) 
+
+            # 결과 저장
+            row_values = (
+                date, race_no, horse_name, axis_horse["total_score"], actual_rank,
+                is_plc_hit,  # is_hit: 기존 호환 (연승 기준)
+                is_win_hit, win_return, is_qui_hit, qui_return,
+                is_trio_hit, trio_return, is_veto
+            )
+            for col, value in zip(RESULT_COLS, row_values):
+                results[col].append(value)
+
+            # W 보너스 통계
+            if axis_horse["position"]["w_bonus_count"] > 0:
+                w_bonus_stats["total"] += 1
+                if is_plc_hit:
+                    w_bonus_stats["hit"] += 1
+
+            # VETO 검증 통계
+            for horse in sim_results:
+                if horse["veto"]:
+                    veto_stats["total"] += 1
+                    h_name = horse["horse_name"]
+                    act_data = actual_ranks.get(h_name, {"rank": 99})
+                    act_rank = act_data["rank"]
+                    if act_rank > 3:  # 3위 밖으로 밀려나면 VETO 성공
+                        veto_stats["failed"] += 1
+
+        return results, veto_stats, w_bonus_stats
+
+    def _merge_date_output(self, out, results, veto_stats, w_bonus_stats):
+        """날짜별 시뮬레이션 결과를 전체 누적치에 합산"""
+        date_results, date_veto, date_w_bonus = out
+        for col in RESULT_COLS:
+            results[col].extend(date_results[col])
+        for key in veto_stats:
+            veto_stats[key] += date_veto[key]
+        for key in w_bonus_stats:
+            w_bonus_stats[key] += date_w_bonus[key]
 
-                # 1. 단승식 (Win) - 축마 기준
-                is_win_hit = actual_rank == 1
-                win_return = actual_data["winOdds"] if is_win_hit else 0.0
-                
-                # 2. 연승식 (Place) - 축마 기준
-                is_plc_hit = actual_rank <= 3
-                plc_return = actual_data["plcOdds"] if is_plc_hit else 0.0
-
-                # 3. 복승식 (Quinella) - 축마 포함 + (도전+복병) 중 1두가 1,2위 구성
-                #    조합: Axis - {Any from Challengers + Dark}
-                is_qui_hit = False
-                qui_return = 0.0
-                
-                # 실제 1, 2위 마명 찾기
-                r1_name = next((n for n, d in actual_ranks.items() if d["rank"] == 1), None)
-                r2_name = next((n for n, d in actual_ranks.items() if d["rank"] == 2), None)
-                
-                # 내 픽 명단 (Axis, Challenger, DarkHub)
-                my_picks = [h["horse_name"] for h in selected_horses] # 총 6두
-                
-                # 축마가 1,2위 안에 있고, 나머지 한 마리가 내 픽 안에 있으면 적중 (축 중심 베팅 가정)
-                if axis_horse["horse_name"] in [r1_name, r2_name]:
-                    partner = r2_name if axis_horse["horse_name"] == r1_name else r1_name
-                    if partner in my_picks:
-                        is_qui_hit = True
-                        qui_return = actual_data.get("qui_div", 0.0)
-
-                # 4. 삼복승식 (Trio) - 축마 포함 + 나머지 2두가 내 픽 안에 있음 (1,2,3위)
-                is_trio_hit = False
-                trio_return = 0.0
-                r3_name = next((n for n, d in actual_ranks.items() if d["rank"] == 3), None)
-                
-                rank_names = [r1_name, r2_name, r3_name]
-                if axis_horse["horse_name"] in rank_names:
-                    # 축마 제외한 나머지 2마리 정답
-                    needed_partners = [n for n in rank_names if n != axis_horse["horse_name"]]
-                    # 내 픽(축 제외)과 교집합 확인
-                    partners_in_picks = [n for n in needed_partners if n in my_picks]
-                    if len(partners_in_picks) == 2:
-                        is_trio_hit = True # 축1 + 파트너2 적중 
-                        trio_return = actual_data.get("trio_div", 0.0) 
-
-                # 결과 저장
-                results.append({
-                    "date": date,
-                    "race_no": race_no,
-                    "horse": horse_name,
-                    "pred_score": axis_horse["total_score"],
-                    "actual_rank": actual_rank,
-                    "is_hit": is_plc_hit, # 기존 호환 (연승 기준)
-                    "is_win_hit": is_win_hit,
-                    "win_return": win_return,
-                    "is_qui_hit": is_qui_hit,
-                    "qui_return": qui_return,
-                    "is_trio_hit": is_trio_hit,
-                    "trio_return": trio_return,
-                    "is_veto": is_veto
-                })
+    def run(self, start_date: str, end_date: str, meet: str = "1",
+            params: dict = None, preloaded: dict = None, n_jobs: int = 1) -> dict:
+        """
+        지정된 기간 동안 백테스팅 수행.
 
-                # W 보너스 통계
-                if axis_horse["position"]["w_bonus_count"] > 0:
-                    w_bonus_stats["total"] += 1
-                    if is_plc_hit:
-                        w_bonus_stats["hit"] += 1
-
-                # VETO 검증 통계
-                for horse in sim_results:
-                    if horse["veto"]:
-                        veto_stats["total"] += 1
-                        h_name = horse["horse_name"]
-                        act_data = actual_ranks.get(h_name, {"rank": 99})
-                        act_rank = act_data["rank"]
-                        if act_rank > 3:  # 3위 밖으로 밀려나면 VETO 성공
-                            veto_stats["failed"] += 1
+        Args:
+            start_date: 시작일 (YYYYMMDD)
+            end_date: 종료일 (YYYYMMDD)
+            meet: 경마장 코드
+            params: 분석기 파라미터 (튜닝용)
+            preloaded: prefetch() 결과 (있으면 날짜별 로드/수집 생략)
+            n_jobs: 날짜 단위 병렬 프로세스 수 (1=순차, -1=CPU 코어 수)
+
+        Returns:
+            dict — 성과 지표 (적중률, ROI 등)
+        """
+        workers = _resolve_workers(n_jobs)
+        console.print(f"\n[bold magenta]🧪 백테스팅 시작 ({start_date} ~ {end_date})[/bold magenta]")
+        if params:
+            console.print(f"[dim]파라미터: {params}[/dim]")
+
+        # 날짜 리스트 생성 (주말만 체크)
+        dates = self._generate_dates(start_date, end_date)
+        # 재수집 지정 날짜는 워커 분배 전에 부모 프로세스에서 캐시 삭제
+        self._invalidate_refresh_dates(dates, meet)
+        
+        # 결과는 컬럼별 리스트로 누적 (경주마다 행 dict 생성 및 DataFrame 생성 시 dtype 재추론 방지)
+        results = {col: [] for col in RESULT_COLS}
+        veto_stats = {"total": 0, "failed": 0}  # VETO된 마필 중 실제 입상 실패 비율
+        w_bonus_stats = {"total": 0, "hit": 0}  # W 보너스 받은 마필 중 입상 비율
+
+        analyzer = _cached_analyzer(json.dumps(params or {}, sort_keys=True))
+
+        if workers == 1 or len(dates) <= 1:
+            for date in track(dates, description="Running Simulation..."):
+                # 1. 데이터 로드 (튜닝 시 미리 로드된 데이터 우선)
+                data = self._get_date_data(date, meet, preloaded)
+                if data is None:
+                    continue
+                # 2. 시뮬레이션
+                self._merge_date_output(self._simulate_date(date, data, analyzer),
+                                        results, veto_stats, w_bonus_stats)
+        else:
+            # 날짜끼리 독립적이므로 워커 프로세스에서 로드/시뮬레이션 후 부모에서 합산
+            n = len(dates)
+            date_data = [{d: preloaded[d]} if preloaded is not None and d in preloaded else None
+                         for d in dates]
+            with ProcessPoolExecutor(max_workers=min(workers, n), initializer=_init_date_worker,
+                                     initargs=(getattr(self, 'demo_mode', False), self.verbose)) as pool:
+                outputs = pool.map(_simulate_date_worker, dates, [meet] * n, [params] * n, date_data)
+                for out in track(outputs, total=n, description="Running Simulation..."):
+                    if out is not None:
+                        self._merge_date_output(out, results, veto_stats, w_bonus_stats)
 
         # 3. 최종 리포트
         df_res = pd.DataFrame(results)
@@ -398,27 +465,32 @@ class Backtester:
             console.print("[yellow]데이터가 충분하지 않습니다.[/yellow]")
             return {}
 
-        # 메트릭 계산
+        # 메트릭 계산 (컬럼별 집계를 한 번에 수행)
         total_races = len(df_res)
+        stats = df_res.agg({
+            "is_win_hit": "mean", "win_return": "sum", "is_hit": "mean",
+            "is_qui_hit": "mean", "qui_return": "sum",
+            "is_trio_hit": "mean", "trio_return": "sum",
+        })
         
         # Win (단승)
-        win_acc = df_res["is_win_hit"].mean() * 100
-        win_roi = df_res["win_return"].sum() / total_races * 100 if total_races > 0 else 0
+        win_acc = stats["is_win_hit"] * 100
+        win_roi = stats["win_return"] / total_races * 100 if total_races > 0 else 0
         
         # Place (연승 - Top 3)
-        plc_acc = df_res["is_hit"].mean() * 100
+        plc_acc = stats["is_hit"] * 100
         
         # Quinella (복승) - 5 Combinations (Axis + 5 Partners)
         # Cost per race = 5 units
         total_cost_qui = total_races * 5
-        qui_acc = df_res["is_qui_hit"].mean() * 100
-        qui_roi = (df_res["qui_return"].sum() / total_cost_qui) * 100 if total_cost_qui > 0 else 0
+        qui_acc = stats["is_qui_hit"] * 100
+        qui_roi = (stats["qui_return"] / total_cost_qui) * 100 if total_cost_qui > 0 else 0
         
         # Trio (삼복승) - 10 Combinations (Axis + 5 Partners -> 5C2)
         # Cost per race = 10 units
         total_cost_trio = total_races * 10
-        trio_acc = df_res["is_trio_hit"].mean() * 100
-        trio_roi = (df_res["trio_return"].sum() / total_cost_trio) * 100 if total_cost_trio > 0 else 0
+        trio_acc = stats["is_trio_hit"] * 100
+        trio_roi = (stats["trio_return"] / total_cost_trio) * 100 if total_cost_trio > 0 else 0
         
         veto_acc = (veto_stats["failed"] / veto_stats["total"] * 100) if veto_stats["total"] > 0 else 0
         w_bonus_acc = (w_bonus_stats["hit"] / w_bonus_stats["total"] * 100) if w_bonus_stats["total"] > 0 else 0
@@ -439,16 +511,47 @@ class Backtester:
             "total_races": len(df_res)
         }
 
-    def tune_parameters(self):
-        """파라미터 튜닝 (Grid Search)"""
-        console.print("\n[bold cyan]🔧 파라미터 튜닝 시작[/bold cyan]")
+    def tune_parameters(self, n_jobs: int = 1, strategy: str = "grid", n_iter: int = 6):
+        """
+        파라미터 튜닝 (Grid Search / Random Search)
+
+        Args:
+            n_jobs: 병렬 프로세스 수 (1=순차, -1=CPU 코어 수)
+            strategy: "grid" (고정 후보 전수) 또는 "random" (범위 내 무작위 표본)
+            n_iter: random 전략의 평가 횟수
+        """
+        workers = _resolve_workers(n_jobs)
+        console.print(f"\n[bold cyan]🔧 파라미터 튜닝 시작 ({strategy})[/bold cyan]")
         
-        # 튜닝할 파라미터 범위 정의
-        w_bonuses = [20, 30, 40]
-        pos_weights_opts = [
-            {"4M": 50, "3M": 40, "2M": 30},  # 기본
-            {"4M": 60, "3M": 40, "2M": 20},  # 선행 강화
-        ]
+        if strategy == "random":
+            # 파라미터별 범위에서 독립 표본 (5 단위)
+            rng = np.random.default_rng()
+            param_list = [
+                {
+                    "w_bonus": int(rng.integers(2, 13)) * 5,            # 10 ~ 60
+                    "position_weights": {
+                        **config.POSITION_WEIGHTS,
+                        "4M": int(rng.integers(8, 15)) * 5,             # 40 ~ 70
+                        "3M": int(rng.integers(6, 11)) * 5,             # 30 ~ 50
+                        "2M": int(rng.integers(2, 9)) * 5,              # 10 ~ 40
+                    }
+                }
+                for _ in range(n_iter)
+            ]
+        else:
+            # 튜닝할 파라미터 범위 정의
+            w_bonuses = [20, 30, 40]
+            pos_weights_opts = [
+                {"4M": 50, "3M": 40, "2M": 30},  # 기본
+                {"4M": 60, "3M": 40, "2M": 20},  # 선행 강화
+            ]
+            param_list = [
+                {
+                    "w_bonus": w,
+                    "position_weights": {**config.POSITION_WEIGHTS, **pos_w}
+                }
+                for w, pos_w in itertools.product(w_bonuses, pos_weights_opts)
+            ]
         
         best_score = 0
         best_params = {}
@@ -459,16 +562,26 @@ class Backtester:
         s_str = start_dt.strftime("%Y%m%d")
         e_str = end_dt.strftime("%Y%m%d")
 
-        for w, pos_w in itertools.product(w_bonuses, pos_weights_opts):
-            params = {
-                "w_bonus": w,
-                "position_weights": {**config.POSITION_WEIGHTS, **pos_w}
-            }
-            
-            res = self.run(s_str, e_str, "1", params=params)
-            score = res.get("hit_rate", 0)
-            
-            console.print(f"👉 Score: {score:.1f}% (W={w})")
+        # 모든 그리드 지점이 같은 기간을 쓰므로 데이터는 1회만 로드
+        preloaded = self.prefetch(s_str, e_str, "1")
+
+        if workers == 1:
+            scored = [
+                (self.run(s_str, e_str, "1", params=params, preloaded=preloaded).get("hit_rate", 0), params)
+                for params in param_list
+            ]
+        else:
+            # 그리드 지점끼리 독립적이므로 프로세스별 Backtester로 병렬 평가
+            n = len(param_list)
+            demo_mode = getattr(self, 'demo_mode', False)
+            with ProcessPoolExecutor(max_workers=min(workers, n)) as pool:
+                scored = list(pool.map(
+                    _eval_params, [s_str] * n, [e_str] * n, ["1"] * n,
+                    param_list, [preloaded] * n, [demo_mode] * n, [self.verbose] * n
+                ))
+
+        for score, params in scored:
+            console.print(f"👉 Score: {score:.1f}% (W={params['w_bonus']})")
             
             if score > best_score:
                 best_score = score
@@ -496,77 +609,79 @@ class Backtester:
         return dates
 
     def _group_by_race(self, df):
-        race_col = None
-        for col in ["rcNo", "rc_no", "raceNo", "경주번호"]:
-            if col in df.columns:
-                race_col = col
-                break
+        race_col = _resolve_col(tuple(df.columns), ("rcNo", "rc_no", "raceNo", "경주번호"))
+        # 경주번호별 행 위치만 반환 (그룹 DataFrame을 미리 모두 만들지 않음)
         if not race_col:
-            return {1: df}
-        return dict(list(df.groupby(race_col)))
+            return {1: np.arange(len(df))}
+        return df.groupby(race_col).indices
 
     def _get_actual_ranks(self, race_no, results_df):
-        """결과 데이터에서 마명:순위 맵 생성"""
-        race_col = None
-        for col in ["rcNo", "rc_no", "raceNo", "raceno"]:
-            if col in results_df.columns:
-                race_col = col
-                break
-        
-        name_col = None
-        for col in ["hrName", "hr_name", "마명", "hrnm"]:
-            if col in results_df.columns:
-                name_col = col
-                break
-                
-        ord_col = None
-        for col in ["ord", "ranking", "순위", "rcOrd", "rk"]:
-            if col in results_df.columns:
-                ord_col = col
-                break
+        """결과 데이터에서 (마명:순위 맵, 순위:마명 역인덱스) 생성"""
+        cols = tuple(results_df.columns)
+        race_col = _resolve_col(cols, ("rcNo", "rc_no", "raceNo", "raceno"))
+        name_col = _resolve_col(cols, ("hrName", "hr_name", "마명", "hrnm"))
+        ord_col = _resolve_col(cols, ("ord", "ranking", "순위", "rcOrd", "rk"))
                 
         if not race_col or not name_col or not ord_col:
-            return {}
+            return {}, {}
             
         # 해당 경주 필터링
         race_res = results_df[results_df[race_col].astype(str) == str(race_no)]
         
-        ranks = {}
-        for _, row in race_res.iterrows():
-            try:
-                rank = int(row[ord_col])
-                name = str(row[name_col])
-                
-                # 배당률 추가 추출
-                win_odds = float(row.get("winOdds", 0) or 0)
-                plc_odds = float(row.get("plcOdds", 0) or 0)
-                qui_div = float(row.get("qui_div", 0) or 0)
-                trio_div = float(row.get("trio_div", 0) or 0)
-                
-                ranks[name] = {
-                    "rank": rank,
-                    "winOdds": win_odds,
-                    "plcOdds": plc_odds,
-                    "qui_div": qui_div,
-                    "trio_div": trio_div
-                }
-            except:
-                continue
-        return ranks
+        # 컬럼 단위 일괄 변환 (순위 변환 불가 행은 제외)
+        ord_arr = pd.to_numeric(race_res[ord_col], errors="coerce").to_numpy()
+        names = race_res[name_col].astype(str).to_numpy()
+
+        # 배당률 추가 추출
+        def odds(col):
+            if col not in race_res.columns:
+                return np.zeros(len(race_res))
+            return pd.to_numeric(race_res[col], errors="coerce").fillna(0.0).to_numpy()
+
+        ranks = {
+            name: {
+                "rank": int(rank),
+                "winOdds": float(win_odds),
+                "plcOdds": float(plc_odds),
+                "qui_div": float(qui_div),
+                "trio_div": float(trio_div)
+            }
+            for name, rank, win_odds, plc_odds, qui_div, trio_div in zip(
+                names, ord_arr, odds("winOdds"), odds("plcOdds"), odds("qui_div"), odds("trio_div"))
+            if not np.isnan(rank)
+        }
+
+        # 동순위는 먼저 나온 마필 기준
+        rank_to_name = {}
+        for name, d in ranks.items():
+            rank_to_name.setdefault(d["rank"], name)
+        return ranks, rank_to_name
+
+    def _resolve_history_cols(self, columns):
+        """과거 기록 컬럼명 매핑 (출전표 컬럼 기준 1회만 탐색)"""
+        # 컬럼명 패턴: s1f_1, s1f1, S1F_1 등 다양할 수 있음
+        lowered = [(c, c.lower()) for c in columns]
+
+        def find(names):
+            return next((c for c, low in lowered if low in names), None)
 
-    def _build_history(self, row):
-        """과거 기록 구성 (API 응답 스키마에 따라 유동적)"""
-        history = []
         # API에서 최근 5경주 기록을 s1f_1, ord_1 등으로 제공한다고 가정
-        for i in range(1, 6):
-            # 컬럼명 패턴: s1f_1, s1f1, S1F_1 등 다양할 수 있음
-            s1f_key = next((k for k in row.index if k.lower() in [f"s1f_{i}", f"s1f{i}"]), None)
-            g1f_key = next((k for k in row.index if k.lower() in [f"g1f_{i}", f"g1f{i}"]), None)
-            ord_key = next((k for k in row.index if k.lower() in [f"ord_{i}", f"ord{i}", f"rank_{i}"]), None)
-            pos_key = next((k for k in row.index if k.lower() in [f"pos_{i}", f"pos{i}"]), None)
-            cor_key = next((k for k in row.index if k.lower() in [f"corner_{i}", f"corner{i}"]), None)
-            wgt_key = next((k for k in row.index if k.lower() in [f"wg_{i}", f"wg{i}", f"weight_{i}"]), None)
-            date_key = next((k for k in row.index if k.lower() in [f"rcdate_{i}", f"date_{i}"]), None)
+        return [{
+            "s1f": find([f"s1f_{i}", f"s1f{i}"]),
+            "g1f": find([f"g1f_{i}", f"g1f{i}"]),
+            "ord": find([f"ord_{i}", f"ord{i}", f"rank_{i}"]),
+            "pos": find([f"pos_{i}", f"pos{i}"]),
+            "corner": find([f"corner_{i}", f"corner{i}"]),
+            "weight": find([f"wg_{i}", f"wg{i}", f"weight_{i}"]),
+            "date": find([f"rcdate_{i}", f"date_{i}"]),
+        } for i in range(1, 6)]
+
+    def _build_history(self, row, col_map):
+        """과거 기록 구성 (API 응답 스키마에 따라 유동적, col_map은 _resolve_history_cols 결과)"""
+        history = []
+        for i, cols in enumerate(col_map, 1):
+            s1f_key, g1f_key, ord_key = cols["s1f"], cols["g1f"], cols["ord"]
+            pos_key, cor_key, wgt_key, date_key = cols["pos"], cols["corner"], cols["weight"], cols["date"]
 
             if s1f_key:
                 history.append({
@@ -581,26 +696,85 @@ class Backtester:
                 })
         return history
 
-    def _build_training(self, horse_name, training_df):
-        """조교 데이터 매칭"""
+    def _build_steward_reports(self, row):
+        """Steward Reports 구성 (steward_report_1은 enrichment 단계에서 추가됨)"""
+        if "steward_report_1" in row and row["steward_report_1"]:
+            # 1전 날짜 가져오기
+            return [{
+                "date": str(row.get("rcDate_1", "")),
+                "report": str(row["steward_report_1"])
+            }]
+        return []
+
+    def _batch_bad_luck(self, names, reports):
+        """리포트가 있는 마필의 AI 불운 판정을 동시 요청 (리포트 없는 마필은 None)"""
+        results = [None] * len(names)
+        pending = [i for i, rpts in enumerate(reports) if rpts]
+        if not pending or not self.ai_analyst:
+            return results
+
+        # 첫 번째(직전 경주) 리포트만 판정
+        def check(i):
+            return self.ai_analyst.analyze_bad_luck(names[i], reports[i][0]["report"])
+
+        with ThreadPoolExecutor(max_workers=min(8, len(pending))) as pool:
+            for i, res in zip(pending, pool.map(check, pending)):
+                results[i] = res
+        return results
+
+    def _index_training(self, training_df):
+        """조교 데이터를 마명별로 1회 인덱싱 ({마명: 조교 기록 리스트})"""
         if training_df is None or training_df.empty:
-            return []
-            
-        name_col = next((c for c in training_df.columns if c.lower() in ["hrname", "hr_name", "마명"]), None)
-        if not name_col:
-            return []
+            return {}
 
-        matched = training_df[training_df[name_col].astype(str) == horse_name]
-        records = []
-        for _, tr in matched.iterrows():
-            gbn_col = next((c for c in tr.index if c.lower() in ["trgbn", "type"]), None)
-            dist_col = next((c for c in tr.index if c.lower() in ["trdist", "distance"]), None)
-            
-            records.append({
-                "type": str(tr.get(gbn_col, "보")) if gbn_col else "보",
-                "distance": float(tr.get(dist_col, 0)) if dist_col else 0,
+        cols = tuple(training_df.columns)
+        name_col = _resolve_col(cols, ("hrname", "hr_name", "마명"), ignore_case=True)
+        if not name_col:
+            return {}
+        gbn_col = _resolve_col(cols, ("trgbn", "type"), ignore_case=True)
+        dist_col = _resolve_col(cols, ("trdist", "distance"), ignore_case=True)
+
+        n = len(training_df)
+        names = training_df[name_col].astype(str).to_numpy()
+        types = [str(v) for v in training_df[gbn_col]] if gbn_col else ["보"] * n
+        dists = training_df[dist_col].to_numpy() if dist_col else [0] * n
+
+        index = {}
+        for name, tr_type, dist in zip(names, types, dists):
+            index.setdefault(name, []).append({
+                "type": tr_type,
+                "distance": float(dist),
             })
-        return records
+        return index
+
+def _eval_params(start, end, meet, params, preloaded=None, demo_mode=False, verbose=False):
+    """튜닝 그리드 1개 지점 평가 (워커 프로세스에서 자체 Backtester 생성, 호출측 모드 유지)"""
+    bt = Backtester()
+    bt.demo_mode = demo_mode
+    bt.verbose = verbose
+    res = bt.run(start, end, meet, params=params, preloaded=preloaded)
+    return res.get("hit_rate", 0), params
+
+
+# 날짜 병렬 시뮬레이션용 워커 프로세스별 Backtester
+_date_worker = None
+
+
+def _init_date_worker(demo_mode, verbose):
+    """워커 프로세스 초기화 (프로세스당 1회 Backtester 생성)"""
+    global _date_worker
+    _date_worker = Backtester()
+    _date_worker.demo_mode = demo_mode
+    _date_worker.verbose = verbose
+
+
+def _simulate_date_worker(date, meet, params, preloaded=None):
+    """날짜 1개 로드 + 시뮬레이션 (로드 실패 시 None)"""
+    data = _date_worker._get_date_data(date, meet, preloaded)
+    if data is None:
+        return None
+    analyzer = _cached_analyzer(json.dumps(params or {}, sort_keys=True))
+    return _date_worker._simulate_date(date, data, analyzer)
 
 
 if __name__ == "__main__":
@@ -609,9 +783,17 @@ if __name__ == "__main__":
     parser.add_argument("--end", default="20251231")
     parser.add_argument("--meet", default="1")
     parser.add_argument("--tune", action="store_true")
+    parser.add_argument("--jobs", type=int, default=1, help="병렬 프로세스 수 (튜닝: 그리드 지점, 백테스트: 날짜 단위 / -1=전체 코어)")
+    parser.add_argument("--strategy", choices=["grid", "random"], default="grid", help="튜닝 탐색 방식")
+    parser.add_argument("--n-iter", type=int, default=6, help="random 탐색 평가 횟수")
     parser.add_argument("--no-api", action="store_true", help="웹 스크래핑 강제 사용")
     parser.add_argument("--demo", action="store_true", help="데모 모드 (가상 데이터)")
+    parser.add_argument("--verbose", action="store_true", help="경주/마필 단위 디버그 출력")
+    parser.add_argument("--refresh-date", action="append", default=[], metavar="YYYYMMDD",
+                        help="해당 날짜 캐시 삭제 후 재수집 (여러 번 지정 가능)")
     args = parser.parse_args()
+    if args.jobs < 1 and args.jobs != -1:
+        parser.error("--jobs는 1 이상 또는 -1이어야 합니다")
 
     if args.no_api:
         config.KRA_API_KEY = ""
@@ -619,8 +801,10 @@ if __name__ == "__main__":
 
     backtester = Backtester()
     backtester.demo_mode = args.demo
+    backtester.verbose = args.verbose
+    backtester.refresh_dates = set(args.refresh_date)
     
     if args.tune:
-        backtester.tune_parameters()
+        backtester.tune_parameters(n_jobs=args.jobs, strategy=args.strategy, n_iter=args.n_iter)
     else:
-        backtester.run(args.start, args.end, args.meet)
+        backtester.run(args.start, args.end, args.meet, n_jobs=args.jobs)
@@ -51,6 +51,14 @@ RACE_RESULT_API = f"{KRA_BASE_URL}/API155/raceResult"
 # 진료 내역 정보 (API18_1 - 경주마 경주전 1년간 진료내역)
 MEDICAL_API = f"{KRA_BASE_URL}/API18_1/racehorseClinicHistory"
 
+# 스크래핑 동시 요청 수 (KRA 서버 부하 고려)
+SCRAPE_MAX_WORKERS = 4
+# 고배당 패턴 분석 시 동시에 조회할 (일자, 경마장) 수 (경주별 병렬 수집과 곱해짐 → 최대 8×4 연결)
+PATTERN_MAX_WORKERS = 8
+# 경주 페이지 스크래핑 메모 (인스턴스 내 재요청 방지) — 유지 시간(초) / 최대 경주 수
+SCRAPE_MEMO_TTL = 600
+SCRAPE_MEMO_MAXSIZE = 512
+
 # ─────────────────────────────────────────────
 # 경마장 코드
 # ─────────────────────────────────────────────
@@ -99,9 +107,17 @@ RECENT_RACES_COUNT = 5
 GEMINI_MODEL = "gemini-2.0-flash"
 GEMINI_TEMPERATURE = 0.3       # 낮은 온도 = 일관된 분석
 GEMINI_MAX_TOKENS = 4096
+GEMINI_PROMPT_CACHE_TTL = 3600  # 시스템 프롬프트 CachedContent 유지 시간 (초)
+GEMINI_MAX_CONCURRENCY = 8     # 전체 카드 분석 시 동시 요청 수 (요청 한도 고려)
+GEMINI_MAX_HORSES = 16         # 경주당 프롬프트에 포함할 최대 출전마 수 (종합점수 상위)
+GEMINI_REPORT_MAX_CHARS = 8000 # 경주당 심판 리포트 최대 글자수 (초과분 절삭)
+UPLOAD_TEXT_MAX_BYTES = 20000  # 업로드 자료 프롬프트 반영 상한 (UTF-8 기준, 한글 약 6,700자)
 
 # ─────────────────────────────────────────────
 # 파일 경로
 # ─────────────────────────────────────────────
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
+GEMINI_CACHE_DIR = os.path.join(DATA_DIR, "gemini_cache")  # 지난 경주 Gemini 응답 캐시
+GEMINI_CACHE_MAX_FILES = 2000  # 응답 캐시 최대 파일 수 (초과 시 오래 안 쓴 것부터 삭제)
+RESULTS_CACHE_DIR = os.path.join(DATA_DIR, "results_cache")  # 패턴 분석용 지난 경주 결과 캐시 (일자_경마장.parquet)
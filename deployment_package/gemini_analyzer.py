@@ -3,98 +3,241 @@ gemini_analyzer.py — Gemini API 정성 분석 모듈
 파이썬 정량 분석 결과 + 심판 리포트 텍스트를 기반으로
 강선축마, 복병, VETO마, Case 판정을 도출합니다.
 """
+import functools
+import hashlib
+import io
 import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 
 from google import genai
 from google.genai import types
 
 import config
 
+logger = logging.getLogger(__name__)
+
 
 # ─────────────────────────────────────────────
 # 전문가 시스템 프롬프트
 # ─────────────────────────────────────────────
-SYSTEM_PROMPT = """당신은 한국 경마 분석 전문가입니다. 아래 용어와 분석 기법을 완벽하게 이해하고 있습니다.
-
-## 핵심 용어 (Core Terms)
-- **F (Front/선행)**: 선두 주행 전법. 초반부터 앞서 달리는 마필.
-- **M (Middle/선입)**: 내측 선입. 중단에서 경주하며 기회를 노리는 마필.
-- **C (Chaser/리베로)**: 후방에서 추격하는 전법. 지구력이 핵심.
-- **W (Wide/외곽)**: 외곽 주행. 불리한 바깥 코스로 주행하며 거리 손해를 봄.
-  → **W 주행 후 입상 = 실제 능력이 매우 뛰어난 마필** (최고 가산점)
-
-## S1F / G1F 분석
-- **S1F**: 초반 200m 구간 기록. 선행력(출발 스피드) 지표.
-- **G1F**: 종반 200m 구간 기록. 지구력(마무리 스피드) 지표.
-- **G1F 벡터**: G1F 기록의 추세.
-  - "Strong": 종반에도 속도 유지/가속 → 지구력 검증
-  - "Maintaining": 약간 감속이나 유지 수준 → 양호
-  - "Fading": 종반 탈진 패턴 → 지구력 의문
-
-## 복기 데이터 키워드 (Steward Report)
-분석 시 아래 키워드에 특히 주목하세요:
-- **Blocked(진로 막힘)**: 능력 발휘 못함 → 다음 경주 반등 기대
-- **W(외곽 주행)**: 거리 손해 → 입상하면 아주 높은 평가
-- **출발 불량**: 게이트 문제 → 일시적 핸디캡, 실력과 무관
-- **Strong Finish(강한 마무리)**: 종반 추임새 → 지구력 검증
-- **Stumbled(비틀거림)**: 컨디션 문제 가능성
-
-## 강선축마(Strong Axis) 판정 기준
-다음 조건을 충족하면 **'예외 없는 축마'**로 지정:
-1. 외곽(W) 주행의 불리함을 뚫고 입상한 마필
-2. Strong Finish를 보인 마필 (특히 G1F 벡터 "Strong" 이상)
-3. 진로 방해(Blocked)를 받고도 착순에 근접한 마필
-4. 정량 점수 상위 + 조교 충실 + 체중 적정
-
-## 장구 변화 분석
-- **장구 추가(+)**: 혀끈, 그림자롤, 블링커 등 → 단점 보완 시도 = 승부 의지
-- **장구 해지(-)**: 이전 장구 제거 → 제어력 자신감 or 변화 시도
-→ 장구 변화의 맥락을 해석하여 마필 컨디션 변화 추론
-
-## Case 판정 (경주 유형 분류)
-- **Case A**: 독주형 — 강선행 1두만 존재, 단독 도주 가능
-- **Case B**: 혼전형 — 선행마 2~3두 경합, 체력 소모전
-- **Case C**: 강선행 1 + 약선행 다수 — 승부 경주, 축마 확정에 유리
-- **Case D**: 추입 유리형 — 선행마 과다, 후방 추격마 기회
-
-## 출력 형식
-분석 결과를 반드시 아래 JSON 형식으로 출력하세요:
-```json
-{
-    "race_no": 경주번호,
-    "case_type": "Case A/B/C/D",
-    "case_reason": "판정 근거 설명",
-    "strong_axis": [
-        {
-            "horse": "마명",
-            "reason": "선정 근거 (W 주행 돌파, G1F Strong 등)",
-            "confidence": "상/중/하"
-        }
-    ],
-    "dark_horses": [
-        {
-            "horse": "마명",
-            "reason": "복병 근거 (Blocked 반등, 장구 변화 등)",
-            "potential": "상/중/하"
-        }
-    ],
-    "veto_horses": [
-        {
-            "horse": "마명",
-            "reason": "VETO 사유 (체중 초과, 조교 부족 등)"
-        }
-    ],
-    "final_comment": "종합 코멘트 및 추천 마권 구성 (예: 축마 A → 상대 B,C,D)"
+_PROMPT_DIR = Path(__file__).parent / "prompts"
+
+
+@functools.cache
+def get_system_prompt() -> str:
+    """전문가 시스템 프롬프트 (prompts/system_prompt_ko.txt, 첫 호출 시 1회 로드)"""
+    return (_PROMPT_DIR / "system_prompt_ko.txt").read_text(encoding="utf-8").strip()
+
+# 구조화 출력(JSON 모드) 스키마 — 시스템 프롬프트 출력 형식과 동일한 구조
+_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "race_no": {"type": "INTEGER"},
+        "case_type": {"type": "STRING"},
+        "case_reason": {"type": "STRING"},
+        "strong_axis": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "horse": {"type": "STRING"},
+                    "reason": {"type": "STRING"},
+                    "confidence": {"type": "STRING", "enum": ["상", "중", "하"]},
+                },
+                "required": ["horse", "reason", "confidence"],
+            },
+        },
+        "dark_horses": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "horse": {"type": "STRING"},
+                    "reason": {"type": "STRING"},
+                    "potential": {"type": "STRING", "enum": ["상", "중", "하"]},
+                },
+                "required": ["horse", "reason", "potential"],
+            },
+        },
+        "veto_horses": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "horse": {"type": "STRING"},
+                    "reason": {"type": "STRING"},
+                },
+                "required": ["horse", "reason"],
+            },
+        },
+        "final_comment": {"type": "STRING"},
+    },
+    "required": ["race_no", "case_type", "case_reason", "strong_axis",
+                 "dark_horses", "veto_horses", "final_comment"],
+    # 판정 근거 → 결론 순으로 생성되도록 필드 순서 고정
+    "propertyOrdering": ["race_no", "case_type", "case_reason", "strong_axis",
+                         "dark_horses", "veto_horses", "final_comment"],
 }
-```"""
+
+# 경주 공통 분석 지침 — 모든 경주에서 바이트 단위로 동일해야 함 (경주 데이터 삽입 금지)
+# 프롬프트 앞부분에 두어 Gemini 암묵적 캐시(공통 접두부 할인)가 적용되도록 함
+_STATIC_PREAMBLE = """
+[분석 지침]
+아래 경주 데이터를 종합하여:
+1. **Case 판정** (A/B/C/D)을 먼저 수행하세요.
+2. **주로(Track) 변수 분석**:
+   - 현재 주로 상태(함수율 등)가 정보에 있다면 반영하고, 없다면 기록(G1F)을 통해 주로 빠르기를 추론하세요.
+   - **현재 입력된 주로 상태는 [분석 대상 경주 데이터]의 '주로 상태' 항목을 따르세요 ("정보 없음"이면 기록으로 추론).**
+   - 주로가 빠르다면 선행 유리, 무겁다면 추입 유리 등을 고려하여 유불리를 판단하세요.
+3. **강선축마(Strong Axis)**를 확정하세요 (W 돌파 입상, Strong Finish, Blocked 반등 등).
+4. **복병(Dark Horse)**을 선별하세요 (장구 변화, 과소평가 마필 등).
+5. **VETO 마필**을 명시하세요 (체중/조교 결격).
+6. 최종 마권 구성 추천을 작성하세요.
+
+JSON 형식으로 응답하세요.
+---
+"""
+
+# 경주별 사용자 프롬프트 템플릿 (format_map 으로 경주 데이터 삽입, 공통 지침 뒤에 위치)
+_USER_PROMPT_TMPL = _STATIC_PREAMBLE + """
+[분석 대상 경주 데이터]
+경주 번호: {race_no}경주
+주로 상태: {track_condition}
+
+[정량 분석 결과 (점수순)]
+{quant_text}
+
+[심판/복기 리포트]
+{steward_report}
+
+[장구 변화]
+{equipment_changes}
+{medical_text}
+
+위 데이터를 바탕으로 우승마와 복병을 분석해주세요."""
+
+# 모델별 시스템 프롬프트 CachedContent {model: (cache_name | None, 만료 시각)}
+# 캐시는 모델 단위 리소스이므로 프로세스 전역에서 공유 (분석기 재생성 시 재업로드 방지)
+_PROMPT_CACHES = {}
+# 캐시 생성 직렬화 (카드 병렬 분석 첫 호출 시 스레드마다 중복 생성 → 고아 캐시 과금 방지)
+_PROMPT_CACHE_LOCK = threading.Lock()
+
+# 응답 내 ```json {...} ``` 코드 블록 (한 번의 탐색으로 JSON 본문 추출)
+_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+# 프로세스 전역 genai.Client (HTTP 커넥션 풀 재사용) — API 키 변경 시에만 재생성
+_CLIENT = None
+_CLIENT_KEY = None
+
+
+def _get_client():
+    """공유 genai.Client 반환"""
+    global _CLIENT, _CLIENT_KEY
+    if _CLIENT is None or _CLIENT_KEY != config.GEMINI_API_KEY:
+        _CLIENT = genai.Client(api_key=config.GEMINI_API_KEY)
+        _CLIENT_KEY = config.GEMINI_API_KEY
+    return _CLIENT
+
+
+def _load_cached_response(key: str):
+    """캐시된 분석 결과 로드 (없거나 손상 시 None)"""
+    path = os.path.join(config.GEMINI_CACHE_DIR, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        os.utime(path)  # 최근 사용 표시 (정리 시 mtime 오래된 순으로 삭제)
+        return result
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cached_response(key: str, result: dict):
+    """분석 결과를 캐시에 저장 (실패해도 분석 흐름에는 영향 없음)"""
+    tmp_path = None
+    try:
+        os.makedirs(config.GEMINI_CACHE_DIR, exist_ok=True)
+        # 고유 임시 파일에 쓴 뒤 교체 (동시 저장 시에도 반쯤 쓴 파일이 읽히지 않음)
+        fd, tmp_path = tempfile.mkstemp(dir=config.GEMINI_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(config.GEMINI_CACHE_DIR, f"{key}.json"))
+        tmp_path = None
+    except (OSError, TypeError) as e:
+        logger.warning("Gemini 응답 캐시 저장 실패: %s", e)
+    finally:
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    _prune_cached_responses()
+
+
+def _prune_cached_responses():
+    """캐시 파일 수가 GEMINI_CACHE_MAX_FILES를 넘으면 mtime 오래된 것부터 삭제"""
+    try:
+        with os.scandir(config.GEMINI_CACHE_DIR) as it:
+            entries = [(e.stat().st_mtime, e.path) for e in it if e.name.endswith(".json")]
+    except OSError:
+        return
+    excess = len(entries) - config.GEMINI_CACHE_MAX_FILES
+    if excess <= 0:
+        return
+    entries.sort()
+    for _, path in entries[:excess]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # 다른 스레드가 먼저 삭제한 경우 등
+
+
+def _skipped_result(race_no: int, quantitative_data: list[dict]):
+    """분석 불가 경주(정량 데이터 없음 / 전원 VETO)의 기본 결과, 분석 대상이면 None"""
+    if not quantitative_data:
+        comment, vetoed = "정량 데이터 부족", []
+    elif all(h.get("is_veto") or h.get("veto") for h in quantitative_data):
+        comment, vetoed = "전원 VETO — 분석 대상 마필 없음", quantitative_data
+    else:
+        return None
+    return {
+        "race_no": race_no,
+        "case_type": "N/A",
+        "case_reason": comment,
+        "strong_axis": [],
+        "dark_horses": [],
+        "veto_horses": [
+            {"horse": h.get("horse_name", "?"),
+             "reason": h.get("veto_reason") or h.get("weight", {}).get("note", "")}
+            for h in vetoed
+        ],
+        "final_comment": comment,
+        "raw_response": "",
+        "model_used": None,
+    }
+
+
+def _select_model(model_override, race_date, today_str):
+    """모델 선택: 강제 지정 > 지난 경주 Flash > 당일/미래 경주 Pro (YYYYMMDD 문자열 비교)"""
+    return model_override or (
+        config.GEMINI_FLASH_MODEL if race_date and race_date < today_str else config.GEMINI_PRO_MODEL
+    )
 
 
 class GeminiAnalyzer:
     """Gemini API 기반 정성 분석기"""
 
     def __init__(self):
-        self.client = genai.Client(api_key=config.GEMINI_API_KEY)
+        self.client = _get_client()
         # self.model is distinct per call now
 
     def analyze_race(self, race_no: int,
@@ -104,7 +247,8 @@ class GeminiAnalyzer:
                      track_condition: str = "",
                      medical_history: dict = None,
                      race_date: str = "",
-                     model_override: str = None) -> dict:
+                     model_override: str = None,
+                     _today_str: str = None) -> dict:
         """
         단일 경주에 대한 Gemini 정성 분석.
 
@@ -117,88 +261,72 @@ class GeminiAnalyzer:
             medical_history: {마명: [진료내역, ...]} 딕셔너리
             race_date: 경주 일자
             model_override: 강제 모델 지정 (Flash/Pro)
+            _today_str: 기준 일자 (YYYYMMDD, 카드 단위 분석 시 전달 — 미지정 시 오늘)
 
         Returns:
             dict — 강선축마, 복병, VETO마, Case 판정 결과
         """
-        # [NEW] Dynamic Model Selection
-        selected_model = model_override if model_override else config.GEMINI_PRO_MODEL
-        
-        if not model_override and race_date:
-            try:
-                today_str = datetime.now().strftime("%Y%m%d")
-                if race_date < today_str:
-                    selected_model = config.GEMINI_FLASH_MODEL
-            except Exception:
-                pass # Fallback to Pro if date parsing fails
-
-        # Default empty dict
-        if medical_history is None:
-            medical_history = {}
-        # 정량 데이터를 읽기 쉬운 텍스트로 변환
-        quant_text = self._format_quantitative(race_no, quantitative_data)
-
-        # [NEW] 진료 내역 포맷팅
-        medical_text = ""
-        if medical_history:
-            medical_text = "\n[주요 진료 내역 (최근 1년)]\n"
-            for horse_name, history in medical_history.items():
-                if history:
-                    history_str = ", ".join(history)
-                    medical_text += f"- {horse_name}: {history_str}\n"
-
-        user_prompt = f"""
-[분석 대상 경주 데이터]
-경주 번호: {race_no}경주
-주로 상태: {track_condition if track_condition else "정보 없음"}
-
-[정량 분석 결과 (점수순)]
-{quant_text}
-
-[심판/복기 리포트]
-{steward_report if steward_report else "심판 리포트 데이터 없음"}
-
-[장구 변화]
-{equipment_changes if equipment_changes else "장구 변화 정보 없음"}
-{medical_text}
-
-위 데이터를 바탕으로 우승마와 복병을 분석해주세요.
-
----
-위 데이터를 종합하여:
-1. **Case 판정** (A/B/C/D)을 먼저 수행하세요.
-2. **주로(Track) 변수 분석**:
-   - 현재 주로 상태(함수율 등)가 정보에 있다면 반영하고, 없다면 기록(G1F)을 통해 주로 빠르기를 추론하세요.
-   - **현재 입력된 주로 상태: {track_condition if track_condition else "정보 없음 (기록으로 추론)"}**
-   - 주로가 빠르다면 선행 유리, 무겁다면 추입 유리 등을 고려하여 유불리를 판단하세요.
-3. **강선축마(Strong Axis)**를 확정하세요 (W 돌파 입상, Strong Finish, Blocked 반등 등).
-4. **복병(Dark Horse)**을 선별하세요 (장구 변화, 과소평가 마필 등).
-5. **VETO 마필**을 명시하세요 (체중/조교 결격).
-6. 최종 마권 구성 추천을 작성하세요.
+        # 분석 불가 경주는 API 호출 없이 즉시 반환 (정량 데이터 없음 / 전원 VETO)
+        skipped = _skipped_result(race_no, quantitative_data)
+        if skipped:
+            return skipped
 
-JSON 형식으로 응답하세요."""
+        # [NEW] Dynamic Model Selection
+        selected_model = _select_model(model_override, race_date,
+                                       _today_str or datetime.now().strftime("%Y%m%d"))
+
+        user_prompt = self._build_user_prompt(race_no, quantitative_data, steward_report,
+                                              equipment_changes, track_condition, medical_history)
+
+        # 지난 경주는 입력이 바뀌지 않으므로 동일 프롬프트 재분석 시 저장된 응답 재사용
+        cache_key = None
+        if race_date and race_date < (_today_str or datetime.now().strftime("%Y%m%d")):
+            cache_key = hashlib.sha256(
+                (selected_model + get_system_prompt() + user_prompt).encode("utf-8")
+            ).hexdigest()
+            cached = _load_cached_response(cache_key)
+            if cached is not None:
+                return cached
+
+        # 시스템 프롬프트는 CachedContent 재사용 (생성 불가 시 기존처럼 인라인 전송)
+        cache_name = self._get_prompt_cache(selected_model)
+        if cache_name:
+            gen_config = types.GenerateContentConfig(
+                cached_content=cache_name,
+                temperature=config.GEMINI_TEMPERATURE,
+                max_output_tokens=config.GEMINI_MAX_TOKENS,
+                response_mime_type="application/json",
+                response_schema=_RESPONSE_SCHEMA,
+            )
+        else:
+            gen_config = types.GenerateContentConfig(
+                system_instruction=get_system_prompt(),
+                temperature=config.GEMINI_TEMPERATURE,
+                max_output_tokens=config.GEMINI_MAX_TOKENS,
+                response_mime_type="application/json",
+                response_schema=_RESPONSE_SCHEMA,
+            )
 
         try:
-            response = self.client.models.generate_content(
+            # 스트리밍 수신 (첫 토큰부터 받아 전체 완료 대기 시간 단축)
+            stream = self.client.models.generate_content_stream(
                 model=selected_model,
                 contents=user_prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction=SYSTEM_PROMPT,
-                    temperature=config.GEMINI_TEMPERATURE,
-                    max_output_tokens=config.GEMINI_MAX_TOKENS,
-                )
+                config=gen_config
             )
-
-            result_text = response.text.strip()
+            chunks = [chunk.text for chunk in stream if chunk.text]
+            result_text = "".join(chunks).strip()
 
             # JSON 파싱 시도
             parsed = self._parse_response(result_text)
             parsed["raw_response"] = result_text
             parsed["model_used"] = selected_model
+            if cache_key and not parsed.get("parse_error"):
+                _save_cached_response(cache_key, parsed)
             return parsed
 
         except Exception as e:
-            print(f"  ⚠ Gemini API 오류: {e}")
+            logger.warning("Gemini API 오류: %s", e)
             return {
                 "error": str(e),
                 "race_no": race_no,
@@ -218,26 +346,113 @@ JSON 형식으로 응답하세요."""
         Returns:
             list[dict] — 경주별 분석 결과
         """
-        results = []
-        for race_no, race_data in sorted(all_races.items()):
-            print(f"\n🧠 {race_no}경주 Gemini 분석 중... (주로: {track_condition or '정보없음'}, 모델: {'Flash' if race_date < datetime.now().strftime('%Y%m%d') else 'Pro'})")
-            result = self.analyze_race(
+        races = sorted(all_races.items())
+        # 카드 전체가 같은 기준일로 모델 선택 (자정 경과 시 경주별 모델 뒤바뀜 방지)
+        today_str = datetime.now().strftime("%Y%m%d")
+        model_label = "Flash" if _select_model(None, race_date, today_str) == config.GEMINI_FLASH_MODEL else "Pro"
+        track_label = track_condition or "정보없음"
+
+        def run_race(item):
+            race_no, race_data = item
+            logger.info("🧠 %s경주 Gemini 분석 중... (주로: %s, 모델: %s)", race_no, track_label, model_label)
+            return self.analyze_race(
                 race_no=race_no,
                 quantitative_data=race_data.get("quant_data", []),
                 steward_report=race_data.get("report", ""),
                 equipment_changes=race_data.get("equipment", ""),
                 track_condition=track_condition,
                 medical_history=race_data.get("medical", {}),
-                race_date=race_date
+                race_date=race_date,
+                _today_str=today_str
             )
-            results.append(result)
-            print(f"  ✅ {race_no}경주 분석 완료")
+
+        # 경주별 API 호출은 서로 독립적이므로 동시 요청 (결과는 경주번호 순서 유지)
+        results = []
+        if not races:
+            return results
+        with ThreadPoolExecutor(max_workers=min(config.GEMINI_MAX_CONCURRENCY, len(races))) as pool:
+            for (race_no, _), result in zip(races, pool.map(run_race, races)):
+                results.append(result)
+                logger.info("✅ %s경주 분석 완료", race_no)
 
         return results
 
+    def _build_user_prompt(self, race_no: int, quantitative_data: list[dict],
+                           steward_report: str = "", equipment_changes: str = "",
+                           track_condition: str = "", medical_history: dict = None) -> str:
+        """경주 데이터를 Gemini 사용자 프롬프트로 구성"""
+        # Default empty dict
+        if medical_history is None:
+            medical_history = {}
+        # 입력 토큰 예산: 출전마 상위 N두(종합점수순), 심판 리포트 글자수 상한
+        n_horses = len(quantitative_data)
+        if n_horses > config.GEMINI_MAX_HORSES:
+            quantitative_data = sorted(quantitative_data, key=lambda h: h.get("total_score", 0),
+                                       reverse=True)[:config.GEMINI_MAX_HORSES]
+        if steward_report and len(steward_report) > config.GEMINI_REPORT_MAX_CHARS:
+            logger.info("✂ %s경주 심판 리포트 축약: %d자 → %d자", race_no, len(steward_report), config.GEMINI_REPORT_MAX_CHARS)
+            steward_report = (steward_report[:config.GEMINI_REPORT_MAX_CHARS]
+                              + f"\n[TRUNCATED: 원문 {len(steward_report)}자 중 앞부분만 포함]")
+
+        # 정량 데이터를 읽기 쉬운 텍스트로 변환
+        quant_text = self._format_quantitative(race_no, quantitative_data)
+        if n_horses > config.GEMINI_MAX_HORSES:
+            quant_text += f"[TRUNCATED: 전체 {n_horses}두 중 종합점수 상위 {config.GEMINI_MAX_HORSES}두만 포함]\n"
+
+        # [NEW] 진료 내역 포맷팅
+        medical_text = ""
+        if medical_history:
+            medical_text = "\n[주요 진료 내역 (최근 1년)]\n" + "".join(
+                f"- {horse_name}: {', '.join(history)}\n"
+                for horse_name, history in medical_history.items() if history
+            )
+
+        user_prompt = _USER_PROMPT_TMPL.format_map({
+            "race_no": race_no,
+            "track_condition": track_condition or "정보 없음",
+            "quant_text": quant_text,
+            "steward_report": steward_report or "심판 리포트 데이터 없음",
+            "equipment_changes": equipment_changes or "장구 변화 정보 없음",
+            "medical_text": medical_text,
+        })
+
+        return user_prompt
+
+    def _get_prompt_cache(self, model: str):
+        """모델별 시스템 프롬프트 CachedContent 이름 (최소 토큰 미달 등으로 생성 실패 시 None)"""
+        name, expires_at = _PROMPT_CACHES.get(model, (None, 0.0))
+        if time.time() < expires_at:
+            return name
+
+        with _PROMPT_CACHE_LOCK:
+            # 대기 중 다른 스레드가 이미 생성했으면 그대로 사용
+            name, expires_at = _PROMPT_CACHES.get(model, (None, 0.0))
+            if time.time() < expires_at:
+                return name
+
+            ttl = config.GEMINI_PROMPT_CACHE_TTL
+            try:
+                cache = self.client.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=get_system_prompt(),
+                        ttl=f"{ttl}s",
+                    )
+                )
+                name = cache.name
+            except Exception as e:
+                logger.warning("프롬프트 캐시 생성 실패 (인라인 전송): %s", e)
+                name = None
+            # 만료 직전 재사용 방지를 위해 1분 여유 (실패 시에도 TTL 동안 재시도 안 함)
+            # 교체된 이전 캐시는 진행 중인 요청이 쓰고 있을 수 있으므로 삭제하지 않고 TTL 만료에 맡김
+            _PROMPT_CACHES[model] = (name, time.time() + ttl - 60)
+        return name
+
     def _format_quantitative(self, race_no: int, data: list[dict]) -> str:
         """정량 분석 결과를 Gemini용 텍스트로 포맷팅"""
-        lines = [f"[{race_no}경주 출전마 정량 분석]\n"]
+        # 단일 버퍼에 순차 기록 (경주당 수십 개 조각 문자열 생성 방지)
+        buf = io.StringIO()
+        buf.write(f"[{race_no}경주 출전마 정량 분석]\n")
 
         for h in data:
             speed = h.get("speed", {})
@@ -245,43 +460,38 @@ JSON 형식으로 응답하세요."""
             weight = h.get("weight", {})
             training = h.get("training", {})
 
-            lines.append(f"■ {h.get('horse_name', '?')} (종합: {h.get('total_score', 0)}점, 순위: {h.get('rank', '?')})")
+            buf.write(f"\n■ {h.get('horse_name', '?')} (종합: {h.get('total_score', 0)}점, 순위: {h.get('rank', '?')})\n")
             # [FIX] 데이터 부족 시 멘트 수정
             s_vec = speed.get('g1f_vector', 'N/A')
             if s_vec == "기록기반":
-                lines.append(f"  속도: S1F/G1F 부재로 '총 주파기록' 기반 분석. 속도점수={speed.get('speed_score', 0)}")
+                buf.write(f"  속도: S1F/G1F 부재로 '총 주파기록' 기반 분석. 속도점수={speed.get('speed_score', 0)}\n")
             else:
-                lines.append(f"  속도: S1F평균={speed.get('s1f_avg', 0)}, G1F평균={speed.get('g1f_avg', 0)}, "
-                             f"G1F벡터={s_vec}, 속도점수={speed.get('speed_score', 0)}")
-            lines.append(f"  포지션: 점수={position.get('position_score', 0)}, "
-                         f"W보너스={position.get('w_bonus_count', 0)}회")
-            lines.append(f"  체중: {weight.get('note', '정보없음')}")
-            lines.append(f"  조교: {training.get('detail', '정보없음')}")
+                buf.write(f"  속도: S1F평균={speed.get('s1f_avg', 0)}, G1F평균={speed.get('g1f_avg', 0)}, "
+                          f"G1F벡터={s_vec}, 속도점수={speed.get('speed_score', 0)}\n")
+            buf.write(f"  포지션: 점수={position.get('position_score', 0)}, "
+                      f"W보너스={position.get('w_bonus_count', 0)}회\n")
+            buf.write(f"  체중: {weight.get('note', '정보없음')}\n")
+            buf.write(f"  조교: {training.get('detail', '정보없음')}\n")
 
             if h.get("is_veto"):
-                lines.append(f"  🚫 VETO: {weight.get('note', '')}")
-
-            lines.append("")
+                buf.write(f"  🚫 VETO: {weight.get('note', '')}\n")
 
-        return "\n".join(lines)
+        return buf.getvalue()
 
     def _parse_response(self, text: str) -> dict:
         """Gemini 응답에서 JSON 추출"""
-        # ```json ... ``` 블록 추출
-        if "```json" in text:
-            start = text.index("```json") + 7
-            end = text.index("```", start)
-            json_str = text[start:end].strip()
-        elif "```" in text:
-            start = text.index("```") + 3
-            end = text.index("```", start)
-            json_str = text[start:end].strip()
-        else:
-            # 전체 텍스트를 JSON으로 시도
-            json_str = text.strip()
+        # JSON 모드 응답은 그대로 파싱
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
 
+        # ```json ... ``` 블록 추출 (JSON 모드 미적용 응답 대비)
+        m = _FENCE_RE.search(text)
+        if not m:
+            return {"parse_error": True, "text_response": text}
         try:
-            return json.loads(json_str)
+            return json.loads(m.group(1))
         except json.JSONDecodeError:
             # JSON 파싱 실패 시 텍스트 그대로 반환
             return {
@@ -294,6 +504,7 @@ JSON 형식으로 응답하세요."""
 # 단독 실행 테스트
 # ─────────────────────────────────────────────
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     analyzer = GeminiAnalyzer()
 
     # 샘플 정량 데이터
@@ -3,49 +3,201 @@ kra_scraper.py — KRA 데이터 수집 모듈
 공공데이터포털 API를 통해 출전표, 조교, 경주마 정보, 경주결과를 수집합니다.
 API 불가 시 KRA 웹사이트 스크래핑 폴백을 제공합니다.
 """
+import functools
 import json
 import os
+import re
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from urllib.parse import quote_plus
 
 import pandas as pd
 import requests
-import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import html as lxml_html
 import warnings
 from io import StringIO
 
 # Suppress FutureWarning for read_html
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
+# 응답 압축: brotli 설치 시 br까지 요청 (urllib3가 자동 해제)
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip, deflate"
+
+# pyarrow 설치 시 Arrow 문자열 커널(문자열 정제) + Parquet 캐시 사용
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+    _STR_DTYPE = "string[pyarrow]"
+except ImportError:
+    _HAS_PYARROW = False
+    _STR_DTYPE = "string"
+
 import config
 
 
+# 10회 전적 표 머리행의 마번 (첫 번째 숫자)
+_HR_NO_RE = re.compile(r'(\d+)')
+# 배당 셀의 숫자 (예: "복: 3.5" → 3.5)
+_NUM_RE = re.compile(r"(\d+(\.\d+)?)")
+# 경주성적표 목록의 경주 링크: onclick="ScoreDetailPopup('1','20240302','1');" → (meet, date, rcNo)
+_SCORE_POPUP_RE = re.compile(r"ScoreDetailPopup\s*\(\s*['\"]([^'\"]*)['\"]\s*,\s*['\"]([^'\"]*)['\"]\s*,\s*['\"](\d+)['\"]\s*\)")
+# 마명 링크의 고유 마번: onclick="FnPopHorseDetail('0033667', ...)"
+_POP_HORSE_RE = re.compile(r"PopHorseDetail\s*\(\s*['\"](\d+)['\"]")
+
+
+def _declared_encoding(resp, default: str) -> str:
+    """Content-Type 헤더의 charset (EUC-KR 계열은 상위 호환인 cp949로, 미지정 시 default)"""
+    ct = resp.headers.get("Content-Type", "").lower()
+    enc = ct.split("charset=", 1)[1].split(";")[0].strip() if "charset=" in ct else ""
+    if enc in ("euc-kr", "euc_kr", "ks_c_5601-1987", "cp949"):
+        return "cp949"
+    return enc or default
+
+
+def _table_fragment(html_text: str, keyword: str):
+    """keyword가 처음 나오는 <table>…</table> 원문 조각 (못 찾으면 None)"""
+    pos = html_text.find(keyword)
+    if pos == -1:
+        return None
+    start = html_text.rfind("<table", 0, pos)
+    end = html_text.find("</table>", pos)
+    if start == -1 or end == -1:
+        return None
+    return html_text[start:end + len("</table>")]
+
+
+def _read_table(tbl) -> pd.DataFrame:
+    """lxml <table> 요소 하나만 pandas.read_html로 변환 (타입 추론은 read_html과 동일)"""
+    return pd.read_html(StringIO(lxml_html.tostring(tbl, encoding="unicode")), flavor="lxml")[0]
+
+
+def _cell_text(el) -> str:
+    """lxml 요소의 텍스트 (BeautifulSoup get_text(strip=True)와 동일: 조각별 strip 후 연결)"""
+    return "".join(t.strip() for t in el.itertext())
+
+
+def _coerce_int_col(col: pd.Series, fill: int) -> pd.Series:
+    """숫자 컬럼 일괄 변환: 정수로 읽히지 않는 값(취소, 중지 등)은 fill (int64)"""
+    return pd.to_numeric(col, errors="coerce").fillna(fill).astype("int64")
+
+
+def _parse_time_col(col: pd.Series) -> pd.Series:
+    """시간 문자열 컬럼을 초 단위로 일괄 변환: "0:13.9" -> 13.9, "1:23.0" -> 83.0 (파싱 불가 시 0)"""
+    col = col.str.strip()
+    parts = col.str.split(":")
+    with_colon = pd.to_numeric(parts.str[0], errors="coerce") * 60 + pd.to_numeric(parts.str[1], errors="coerce")
+    plain = pd.to_numeric(col, errors="coerce")
+    return with_colon.where(col.str.contains(":", regex=False), plain).fillna(0.0)
+
+
+def _memoize_scrape(func):
+    """(race_date, meet, race_no) 단위 경주 페이지 스크래핑 메모이즈.
+    SCRAPE_MEMO_TTL 경과 시 재수집, 최대 SCRAPE_MEMO_MAXSIZE건 (오래 안 쓴 경주부터 제거).
+    빈 결과(실패)는 저장하지 않아 재시도 가능, DataFrame은 복사본 반환"""
+    @functools.wraps(func)
+    def wrapper(self, race_date, meet, race_no):
+        key = (func.__name__, str(race_date), str(meet), str(race_no))
+        now = time.monotonic()
+        with self._scrape_memo_lock:
+            entry = self._scrape_memo.get(key)
+            if entry is not None and now - entry[0] < config.SCRAPE_MEMO_TTL:
+                self._scrape_memo.move_to_end(key)
+                hit = entry[1]
+            else:
+                hit = None
+        if hit is None:
+            hit = func(self, race_date, meet, race_no)
+            if (hit.empty if isinstance(hit, pd.DataFrame) else not hit):
+                return hit
+            with self._scrape_memo_lock:
+                self._scrape_memo[key] = (now, hit)
+                self._scrape_memo.move_to_end(key)
+                while len(self._scrape_memo) > config.SCRAPE_MEMO_MAXSIZE:
+                    self._scrape_memo.popitem(last=False)
+        return hit.copy() if isinstance(hit, pd.DataFrame) else hit
+    return wrapper
+
+
+# 헤더가 깨진 출전표의 컬럼 위치 → 표준 컬럼명 (KRA 기본 레이아웃)
+_ENTRY_INDEX_COLS = {0: "hrNo", 1: "hrName", 6: "wgBudam", 8: "weight", 11: "jkName", 12: "trName"}
+
+# 출전표에서 값 종류가 적은 문자열 컬럼 (기수/조교사/성별/경마장 등) → category
+_ENTRY_CATEGORY_COLS = ("jkName", "trName", "sex", "meet", "track", "trType")
+
+
+def _compact_entry_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """출전표 저카디널리티 문자열 컬럼을 category로 변환 (메모리 절감, groupby 가속)"""
+    for col in _ENTRY_CATEGORY_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
 class KRAScraper:
     """KRA 데이터 수집기"""
 
     def __init__(self):
         self.api_key = config.KRA_API_KEY
         self.session = requests.Session()
+        self._scrape_memo = OrderedDict()  # _memoize_scrape 저장소 {key: (저장 시각, 결과)}
+        self._scrape_memo_lock = threading.Lock()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
             "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+            "Accept-Encoding": _ACCEPT_ENCODING,
             "Referer": "https://race.kra.co.kr/",
             "Origin": "https://race.kra.co.kr",
             "Connection": "keep-alive",
             "Upgrade-Insecure-Requests": "1",
         })
+        # keep-alive 커넥션 풀 (병렬 수집 대비) + 일시적 연결 오류/429/5xx 재시도
+        # (경주성적표 상세 POST는 조회 전용 폼이라 재시도 대상에 포함, 429는 Retry-After 준수)
+        # 재시도 소진 시 예외 대신 마지막 응답 반환 → 각 호출부 raise_for_status()가 처리
+        adapter = HTTPAdapter(
+            pool_connections=8, pool_maxsize=32, pool_block=False,
+            max_retries=Retry(total=3, backoff_factor=0.5,
+                              status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=("GET", "POST"),
+                              raise_on_status=False),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         
-        # 세션 초기화 (쿠키 획득)
-        try:
-            self.session.get("https://race.kra.co.kr/", timeout=5)
-        except:
-            pass
+        # 세션 초기화 (쿠키 획득)는 첫 웹 스크래핑 시점으로 지연 — API만 쓰는 경우 요청 생략
+        self._warmed = False
+        self._warm_lock = threading.Lock()
+
+    def _ensure_warm(self):
+        """KRA 메인 페이지를 한 번 요청해 세션 쿠키 확보 (인스턴스당 1회)"""
+        if self._warmed:
+            return
+        with self._warm_lock:
+            if self._warmed:
+                return
+            try:
+                self.session.get("https://race.kra.co.kr/", timeout=5)
+            except:
+                pass
+            self._warmed = True
+
+    def clear_scrape_memo(self):
+        """경주 페이지 스크래핑 메모 비우기 (명시적 재조회 시 최신 데이터 보장)"""
+        with self._scrape_memo_lock:
+            self._scrape_memo.clear()
 
     # 5. [NEW] 출전표상세정보 Web Scraping (API 대체)
     # ─────────────────────────────────────────────
+    @_memoize_scrape
     def scrape_race_entry_page(self, race_date: str, meet: str, race_no: str) -> pd.DataFrame:
         """
         출전상세정보 페이지 스크래핑 (chulmaDetailInfoChulmapyo.do)
@@ -67,9 +219,9 @@ class KRAScraper:
                 "Referer": "https://race.kra.co.kr/chulmainfo/chulmaDetailInfoChulmapyo.do"
             }
             
-            # [FIX] Use requests.get directly to avoid Session encoding quirks
-            import requests
-            resp = requests.get(url, params=params, headers=headers, timeout=10)
+            # 세션 커넥션 풀 재사용 (인코딩은 아래에서 바이트를 직접 디코딩하므로 세션 설정 영향 없음)
+            self._ensure_warm()
+            resp = self.session.get(url, params=params, headers=headers, timeout=10)
             
             # [DEBUG] Inspect Response
             print(f"  [Debug] Final URL: {resp.url}")
@@ -77,95 +229,65 @@ class KRAScraper:
             print(f"  [Debug] Content Length: {len(resp.content)}")
             print(f"  [Debug] Content Hex Prefix: {resp.content[:50].hex()}")
             
-            # [FIX] Manually decode content
+            # [FIX] Content-Type charset 기준으로 한 번만 디코딩
+            # (EUC-KR 계열/미지정이면 cp949 — 문자셋 자동 감지와 meta 치환 패스 생략)
+            enc = _declared_encoding(resp, default="cp949")
             try:
+                html_text = resp.content.decode(enc, errors='replace')
+            except LookupError:
                 html_text = resp.content.decode('cp949', errors='replace')
-            except Exception:
-                 html_text = resp.text
-            
-            # [FIX] Remove/Replace meta charset
-            html_text = html_text.replace('euc-kr', 'utf-8').replace('EUC-KR', 'utf-8')
-            
-            # [FIX] Use BeautifulSoup for robust parsing
-            from bs4 import BeautifulSoup
-            
-            soup = BeautifulSoup(html_text, 'html.parser')
-            tables = soup.find_all('table')
             
+            # 1차: "마명"이 든 표 원문만 잘라 파싱 (나머지 표/메뉴 생략)
+            # 대상 표를 못 찾으면 2차: 전체 페이지 (헤더 깨짐 → Strategy 2)
+            fragment = _table_fragment(html_text, "마명")
+            sources = [fragment, html_text] if fragment else [html_text]
+
             target_df = None
-            
-            # Strategy 1: Header Name Matching
-            for table in tables:
-                headers = []
-                thead = table.find('thead')
-                if thead:
-                    header_row = thead.find('tr')
-                    if header_row:
-                        headers = [th.get_text(strip=True) for th in header_row.find_all(['th', 'td'])]
-                
-                if not headers:
-                    first_tr = table.find('tr')
-                    if first_tr:
-                        headers = [td.get_text(strip=True) for td in first_tr.find_all(['td', 'th'])]
-                
-                # Check keywords (Mojibake might prevent this)
-                if any("마명" in h for h in headers) and any("기수" in h for h in headers):
-                    # Found via headers
-                    rows = []
-                    tbody = table.find('tbody')
-                    tr_list = tbody.find_all('tr') if tbody else table.find_all('tr')
-                    
-                    if not tbody and tr_list and tr_list[0] == table.find('tr'):
-                         tr_list = tr_list[1:]
-                         
-                    for tr in tr_list:
-                        cells = [td.get_text(strip=True) for td in tr.find_all('td')]
-                        if len(cells) == len(headers):
-                            rows.append(cells)
-                        elif len(cells) > 0:
-                            rows.append(cells + [''] * (len(headers) - len(cells)))
-                            
-                    target_df = pd.DataFrame(rows, columns=headers)
-                    break 
+            for source in sources:
+                # 표 추출은 pandas.read_html(lxml C 파서)로 일괄 처리 — 셀 단위 Python 순회 없음
+                try:
+                    tables = pd.read_html(StringIO(source), flavor="lxml", keep_default_na=False)
+                except ValueError:  # 표 없음
+                    tables = []
 
-            # Strategy 2: Index/Structure Matching (Fallback for Mojibake)
-            if target_df is None:
-                for table in tables:
-                    rows = []
-                    tbody = table.find('tbody')
-                    tr_list = tbody.find_all('tr') if tbody else table.find_all('tr')
-                    
+                fallback_df = None  # Strategy 2 후보 (같은 순회에서 함께 기록)
+                for df in tables:
+                    # Strategy 2 후보: Index/Structure Matching (Fallback for Mojibake)
                     # Heuristic: Entry table has many rows and ~15 columns
-                    # Check first row col count
-                    if tr_list:
-                        first_cells = tr_list[0].find_all('td')
-                        if len(first_cells) >= 12: # At least 12 columns
-                             # Extract data without headers
-                             for tr in tr_list:
-                                 cells = [td.get_text(strip=True) for td in tr.find_all('td')]
-                                 if len(cells) >= 12:
-                                     rows.append(cells)
-                             
-                             if rows:
-                                 # Construct DataFrame with dummy columns first
-                                 max_len = max(len(r) for r in rows)
-                                 cols = [f"Col{i}" for i in range(max_len)]
-                                 # Pad rows
-                                 rows_padded = [r + ['']*(max_len-len(r)) for r in rows]
-                                 target_df = pd.DataFrame(rows_padded, columns=cols)
-                                 
-                                 # Map by Index (Standard KRA Layout)
-                                 # 0:No, 1:Name, 6:Burden, 8:Weight, 11:Jockey, 12:Trainer
-                                 rename_map = {
-                                     cols[0]: "hrNo",
-                                     cols[1]: "hrName",
-                                     cols[6]: "wgBudam",
-                                     cols[8]: "weight",
-                                     cols[11]: "jkName",
-                                     cols[12]: "trName"
-                                 }
-                                 target_df = target_df.rename(columns=rename_map)
-                                 break
+                    if fallback_df is None and df.shape[1] >= 12 and not df.empty:
+                        fallback_df = df
+
+                    # Strategy 1: Header Name Matching
+                    if isinstance(df.columns, pd.MultiIndex):
+                        df.columns = df.columns.get_level_values(0)  # 다단 헤더는 첫 행 기준
+                    headers = [str(c) for c in df.columns]
+                    if not (any("마명" in h for h in headers) and any("기수" in h for h in headers)):
+                        # <thead> 없이 첫 행이 헤더인 표
+                        if df.empty:
+                            continue
+                        headers = [str(v) for v in df.iloc[0]]
+                        if not (any("마명" in h for h in headers) and any("기수" in h for h in headers)):
+                            continue
+                        df = df.iloc[1:]
+                    target_df = df.set_axis(headers, axis=1).reset_index(drop=True)
+                    break
+
+                if target_df is not None:
+                    break
+
+            # Strategy 2: 헤더 매칭 실패 시 구조 기준 후보 사용
+            if target_df is None and fallback_df is not None:
+                # Map by Index (Standard KRA Layout) — 최종 컬럼명을 바로 지정 (rename 단계 생략)
+                # 0:No, 1:Name, 6:Burden, 8:Weight, 11:Jockey, 12:Trainer
+                cols = [f"Col{i}" for i in range(fallback_df.shape[1])]
+                for i, name in _ENTRY_INDEX_COLS.items():
+                    if i < len(cols):
+                        cols[i] = name
+                target_df = fallback_df.set_axis(cols, axis=1).reset_index(drop=True)
+
+            if target_df is not None:
+                # 숫자로 추론된 셀도 기존과 같이 문자열로 통일 (빈 셀은 "")
+                target_df = target_df.fillna("").astype(str)
 
             if target_df is None:
                 return pd.DataFrame()
@@ -201,10 +323,6 @@ class KRAScraper:
                      }
                      target_df = target_df.rename(columns=fallback_map)
 
-            # 숫자형 변환 (번호)
-            if "hrNo" in target_df.columns:
-                 target_df["hrNo"] = pd.to_numeric(target_df["hrNo"], errors='coerce').fillna(0).astype(int).astype(str)
-                 
             # [FIX] Return Removed here to allow further processing
             
             # 최근 전적/특이사항 컬럼 찾기 (위치 기반 또는 키워드)
@@ -256,9 +374,9 @@ class KRAScraper:
                 print("  [Warn] 'hrNo' column missing. Using 1st column as 'hrNo'.")
                 target_df = target_df.rename(columns={target_df.columns[0]: "hrNo"})
 
-            # 숫자형 변환 (번호) - Re-apply in case renames happened
+            # 숫자형 변환 (번호) - 컬럼 정리가 끝난 뒤 한 번만
             if "hrNo" in target_df.columns:
-                 target_df["hrNo"] = pd.to_numeric(target_df["hrNo"], errors='coerce').fillna(0).astype(int).astype(str)
+                 target_df["hrNo"] = _coerce_int_col(target_df["hrNo"], 0).astype(str)
                  
             return target_df
 
@@ -266,6 +384,7 @@ class KRAScraper:
             print(f"  [Error] Scraping Entry Page: {e}")
             return pd.DataFrame()
 
+    @_memoize_scrape
     def scrape_steward_reports(self, race_date: str, meet: str, race_no: str) -> dict:
         """
         '심판리포트' 탭 스크래핑 (chulmaDetailInfoStewardsReport.do)
@@ -285,50 +404,43 @@ class KRAScraper:
             }
 
             print(f"  [Scraping] Steward Reports: {race_date} Meet{meet} Race{race_no}")
+            self._ensure_warm()
             resp = self.session.get(url, params=params, headers=headers, timeout=15)
-            # [Fix] Use bytes + BS4 auto-detect or explicit from_encoding
             # Steward reports seem to be mixed or explicitly UTF-8
+            html_text = resp.content.decode("utf-8", errors="replace")
             
-            soup = BeautifulSoup(resp.content, "html.parser", from_encoding="utf-8")
-            tables = soup.find_all("table")
+            # 표 추출은 pandas.read_html(lxml)로 일괄 처리 — "마명"이 들어간 표만 생성
+            try:
+                tables = pd.read_html(StringIO(html_text), flavor="lxml", match="마명", keep_default_na=False)
+            except ValueError:  # 해당 표 없음
+                tables = []
             
             result = {}  # {hrNo: [{"date": ..., "report": ...}]}
             
             # 심판리포트 테이블 찾기 (보통 마지막 테이블, 4컬럼: 마번, 마명, 날짜, 리포트)
-            for tbl in tables:
-                rows = tbl.find_all("tr")
-                if len(rows) < 2:
+            for df in tables:
+                if df.shape[1] != 4:
                     continue
-                
-                # 헤더 확인
-                header_cells = [th.get_text(strip=True) for th in rows[0].find_all(["th", "td"])]
-                if len(header_cells) != 4:
+                if isinstance(df.columns, pd.MultiIndex):
+                    df.columns = df.columns.get_level_values(0)
+                # 헤더 확인: "마명" 헤더 (범례 등 다른 4컬럼 표 제외) — <th> 없으면 첫 행이 헤더
+                if not any("마명" in str(c) for c in df.columns):
+                    if df.empty or not any("마명" in str(v) for v in df.iloc[0]):
+                        continue
+                    df = df.iloc[1:]
+                if df.empty:
                     continue
                 
-                # 데이터 행 파싱
-                for row in rows[1:]:
-                    cells = [td.get_text(strip=True) for td in row.find_all("td")]
-                    if len(cells) < 4:
-                        continue
-                    
-                    hr_no = cells[0].strip()
-                    hr_name = cells[1].strip()
-                    report_date = cells[2].strip()
-                    report_text = cells[3].strip()
-                    
-                    if not hr_no or not hr_no.isdigit():
-                        continue
-                    
-                    if hr_no not in result:
-                        result[hr_no] = []
-                    
-                    # 리포트가 없는 말도 있음 (빈 줄)
-                    if report_text:
-                        result[hr_no].append({
-                            "date": report_date,
-                            "report": report_text,
-                            "hrName": hr_name
-                        })
+                # 마번이 숫자인 행만 (셀이 모자란 행은 빈 리포트로 취급)
+                df = df.fillna("").astype(str).set_axis(["hrNo", "hrName", "date", "report"], axis=1)
+                df = df[df["hrNo"].str.isdigit()]
+                
+                # 리포트가 없는 말도 있음 (빈 줄) → 빈 리스트로 유지
+                result = {hr_no: [] for hr_no in df["hrNo"].unique()}
+                reported = df[df["report"] != ""]
+                for hr_no, idx in reported.groupby("hrNo", sort=False).indices.items():
+                    result[hr_no] = reported.iloc[idx][["date", "report", "hrName"]].to_dict("records")
+                break  # 대상 표는 하나 — 이후 표는 탐색하지 않음
             
             total_reports = sum(len(v) for v in result.values())
             horses_with_reports = sum(1 for v in result.values() if v)
@@ -339,6 +451,7 @@ class KRAScraper:
             print(f"  [Error] Steward Reports scraping: {e}")
             return {}
 
+    @_memoize_scrape
     def scrape_race_10score(self, race_date: str, meet: str, race_no: str) -> dict:
         """
         '최근 10회 전적' 탭 스크래핑 (chulmaDetailInfo10Score.do)
@@ -356,86 +469,76 @@ class KRAScraper:
             }
 
             print(f"  [Scraping] 10 Recent Races: {race_date} Meet{meet} Race{race_no}")
+            self._ensure_warm()
             resp = self.session.get(url, params=params, headers=headers, timeout=15)
-            if resp.encoding == 'ISO-8859-1':
-                resp.encoding = resp.apparent_encoding
+            # 문자셋 자동 감지(apparent_encoding) 대신 Content-Type 선언값 사용, 미지정 시 UTF-8
+            resp.encoding = _declared_encoding(resp, default="utf-8")
             resp.raise_for_status()
 
-            soup = BeautifulSoup(resp.text, "html.parser")
-            tables = soup.find_all("table")
+            # 전적 표가 없는 페이지는 파싱 없이 종료 (S-1F는 ASCII라 인코딩 무관)
+            if b"S-1F" not in resp.content:
+                print("  [OK] 10Score: 0 horses scraped")
+                return {}
+
+            # 첫 S-1F 표 시작 ~ 마지막 S-1F 표 끝만 잘라 파싱 (메뉴/스크립트 등 나머지 페이지 생략)
+            html_text = resp.text
+            start = html_text.rfind("<table", 0, html_text.find("S-1F"))
+            end = html_text.find("</table>", html_text.rfind("S-1F"))
+            if start != -1 and end != -1:
+                html_text = html_text[start:end + len("</table>")]
+
+            # 데이터 테이블 식별: S-1F 컬럼이 있는 테이블 (lxml XPath로 C 레벨에서 한 번에 필터)
+            doc = lxml_html.fromstring(html_text)
+            tables = doc.xpath('//table[contains(., "S-1F")]')
             
-            result = {}  # {hrNo: [records]}
-            
-            for tbl in tables:
-                text = tbl.get_text()
-                # 데이터 테이블 식별: S-1F 컬럼이 있는 테이블
-                if "S-1F" not in text:
-                    continue
-                
-                rows = tbl.find_all("tr")
+            # 셀 원문을 먼저 모두 모은 뒤 컬럼 단위로 일괄 변환
+            raw_rows = []  # [표 순번, 마번, 셀0..셀15]
+            for t_idx, tbl in enumerate(tables):
+                rows = tbl.xpath('.//tr')
                 if len(rows) < 3:
                     continue
                 
                 # Row 0: 말 정보 헤더 (예: "[암]  1큐피드시크  5 세  한국  [기] 조한별  53.5")
-                header_text = rows[0].get_text(strip=True)
+                header_text = _cell_text(rows[0])
                 
                 # 마번 추출 (첫 번째 숫자)
-                import re
-                hr_match = re.search(r'(\d+)', header_text)
+                hr_match = _HR_NO_RE.search(header_text)
                 if not hr_match:
                     continue
                 hr_no = hr_match.group(1)
                 
                 # Row 1: 컬럼 헤더 (순, 일자, 경, 주, 등, 거리, 두수, 착, 순위/두수, 기수, 중량, S-1F, G-3F, G-1F, 기록, 체중, 레이팅, 주)
                 # Row 2+: 데이터 행
-                records = []
                 for row in rows[2:]:
-                    cells = [td.get_text(strip=True) for td in row.find_all("td")]
+                    cells = [_cell_text(td) for td in row.xpath('.//td')]
                     if len(cells) < 15:
                         continue
-                    
-                    try:
-                        # 시간 변환 헬퍼: "0:13.9" -> 13.9, "1:23.0" -> 83.0
-                        def parse_time(t_str):
-                            t_str = str(t_str).strip()
-                            if ":" in t_str:
-                                parts = t_str.split(":")
-                                try:
-                                    return float(parts[0]) * 60 + float(parts[1])
-                                except: return 0
-                            try: return float(t_str)
-                            except: return 0
-
-                        # S1F/G1F는 보통 "0:13.9" (200m) 이므로 초 부분만 필요
-                        s1f_raw = cells[11]
-                        g1f_raw = cells[13]
-                        s1f_sec = parse_time(s1f_raw)  # 0:13.9 -> 13.9
-                        g1f_sec = parse_time(g1f_raw)  # 0:13.7 -> 13.7
-                        
-                        # ord를 정수로 변환
-                        try:
-                            ord_val = int(cells[2])
-                        except:
-                            ord_val = 99
-
-                        record = {
-                            "rcDate": cells[1].replace("/", "").split("-")[0] if "/" in cells[1] else cells[1],
-                            "rcNo": cells[1].split("-")[1].replace("R", "") if "-" in cells[1] else "",
-                            "ord": ord_val,  # 순위 (int)
-                            "rcDist": cells[5],  # 거리
-                            "rcTime": cells[14],  # 기록 (원본 유지)
-                            "s1f": s1f_sec,  # S-1F (초 단위 float)
-                            "g3f": parse_time(cells[12]),  # G-3F (초 단위)
-                            "g1f": g1f_sec,  # G-1F (초 단위 float)
-                            "wgBudam": cells[10],  # 부담중량
-                            "weight": cells[15] if len(cells) > 15 else "",  # 마체중
-                        }
-                        records.append(record)
-                    except (IndexError, ValueError):
-                        continue
-                
-                if records:
-                    result[hr_no] = records
+                    # 16번째(마체중) 셀이 없는 행은 빈 문자열로 채움
+                    raw_rows.append([t_idx, hr_no] + cells[:16] + [""] * (16 - len(cells[:16])))
+
+            result = {}  # {hrNo: [records]}
+            if raw_rows:
+                raw = pd.DataFrame(raw_rows, columns=["tbl", "hrNo"] + [f"c{i}" for i in range(16)])
+                date_col = raw["c1"]  # 예: "2025/01/11-5R"
+                ord_ok = raw["c2"].str.fullmatch(r"[+-]?\d+")
+                records_df = pd.DataFrame({
+                    "rcDate": date_col.str.replace("/", "", regex=False).str.split("-").str[0]
+                              .where(date_col.str.contains("/", regex=False), date_col),
+                    "rcNo": date_col.str.split("-").str[1].str.replace("R", "", regex=False)
+                            .where(date_col.str.contains("-", regex=False), ""),
+                    "ord": pd.to_numeric(raw["c2"].where(ord_ok), errors="coerce").fillna(99).astype(int),  # 순위 (int)
+                    "rcDist": raw["c5"],  # 거리
+                    "rcTime": raw["c14"],  # 기록 (원본 유지)
+                    # S1F/G1F는 보통 "0:13.9" (200m) → 초 단위 float
+                    "s1f": _parse_time_col(raw["c11"]),  # S-1F
+                    "g3f": _parse_time_col(raw["c12"]),  # G-3F
+                    "g1f": _parse_time_col(raw["c13"]),  # G-1F
+                    "wgBudam": raw["c10"],  # 부담중량
+                    "weight": raw["c15"],  # 마체중
+                })
+                # 같은 마번이 여러 표에 있으면 마지막 표 기준 (기존 동작 유지)
+                for (_, hr_no), idx in raw.groupby(["tbl", "hrNo"], sort=False).indices.items():
+                    result[hr_no] = records_df.iloc[idx].to_dict("records")
                     
             print(f"  [OK] 10Score: {len(result)} horses scraped")
             return result
@@ -444,6 +547,20 @@ class KRAScraper:
             print(f"  [Error] 10Score scraping: {e}")
             return {}
 
+    def fetch_all_tabs(self, race_date: str, meet: str, race_no: str) -> tuple:
+        """
+        경주 상세 3개 탭(출전표 / 심판리포트 / 최근 10회 전적)을 동시 요청.
+        탭 간 순서 의존성이 없으므로 세션 커넥션 풀로 병렬 수집.
+
+        Returns:
+            tuple: (entry_df, steward_dict, score_dict)
+        """
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            f_entry = pool.submit(self.scrape_race_entry_page, race_date, meet, race_no)
+            f_steward = pool.submit(self.scrape_steward_reports, race_date, meet, race_no)
+            f_score = pool.submit(self.scrape_race_10score, race_date, meet, race_no)
+        return f_entry.result(), f_steward.result(), f_score.result()
+
     # -------------------------------------------------------------------------
     # Helper Methods
     # -------------------------------------------------------------------------
@@ -506,10 +623,10 @@ class KRAScraper:
             if items:
                 df = pd.DataFrame(items)
                 print(f"  [Success] 출전표 {len(df)}건 수집 완료 (API)")
-                return df
+                return _compact_entry_dtypes(df)
 
         print("  [Info] API 사용 불가 또는 데이터 없음. 웹 스크래핑 시도...")
-        return self._scrape_entries_full(race_date, meet)
+        return _compact_entry_dtypes(self._scrape_entries_full(race_date, meet))
 
     def _scrape_entries_full(self, race_date: str, meet: str) -> pd.DataFrame:
         """KRA 웹사이트에서 출전표 스크래핑 (풀 버전 - 과거 데이터는 경주성적표 활용)"""
@@ -564,26 +681,27 @@ class KRAScraper:
             elif meet == "3": base_url = "https://race.kra.co.kr/jeju/trainer/dailyExerList.do"
             
             params = {"meet": meet, "realDate": date}
+            self._ensure_warm()
             resp = self.session.get(base_url, params=params, timeout=5)
-            # 테이블 파싱
-            dfs = pd.read_html(StringIO(resp.text))
+            # 테이블 파싱 ("마명"이 들어간 표만 DataFrame으로 생성, 없으면 ValueError → 빈 결과)
+            dfs = pd.read_html(StringIO(resp.text), match="마명")
             
-            all_rows = []
-            for df in dfs:
-                # "마명"과 "조교사" 혹은 "기수"가 있는 테이블
-                if "마명" in str(df.columns) and ("조교사" in str(df.columns) or "기수" in str(df.columns)):
-                    rename_map = {
-                        "마명": "hrName", "마 번": "hrNo",
-                        "조교사": "trName", "기수": "jkName",
-                        "조교자": "trName", "총회수": "runCount", "주로": "track",
-                        "구분": "trType",
-                    }
-                    df = df.rename(columns=rename_map)
-                    df["trDate"] = date
-                    all_rows.append(df)
+            rename_map = {
+                "마명": "hrName", "마 번": "hrNo",
+                "조교사": "trName", "기수": "jkName",
+                "조교자": "trName", "총회수": "runCount", "주로": "track",
+                "구분": "trType",
+            }
+            # "마명"과 "조교사" 혹은 "기수"가 있는 테이블
+            all_rows = [
+                df.rename(columns=rename_map) for df in dfs
+                if "마명" in str(df.columns) and ("조교사" in str(df.columns) or "기수" in str(df.columns))
+            ]
             
             if all_rows:
-                merged = pd.concat(all_rows, ignore_index=True)
+                # 표가 하나면 concat 복사 생략, 일자 컬럼은 병합 후 한 번만 추가
+                merged = all_rows[0] if len(all_rows) == 1 else pd.concat(all_rows, ignore_index=True)
+                merged["trDate"] = date
                 # 데이터 타입 정리
                 merged["runCount"] = pd.to_numeric(merged["runCount"], errors="coerce").fillna(0)
                 print(f"  [Success] 웹 스크래핑 조교 데이터 {len(merged)}건 수집")
@@ -600,18 +718,12 @@ class KRAScraper:
         print(f"🏋 금주 조교 데이터 수집 중...")
         race_dt = datetime.strptime(race_date, "%Y%m%d")
 
-        all_data = []
-        for i in range(7):
-            dt = race_dt - timedelta(days=i)
-            date_str = dt.strftime("%Y%m%d")
-            
-            # 위에서 정의한 fetch_training_data 호출 (API or Web)
-            df = self.fetch_training_data(train_date=date_str, meet=meet)
-            if not df.empty:
-                all_data.append(df)
-            
-            # API 사용시는 sleep, 웹은 sleep 덜 필요하지만 매너상 0.2초
-            time.sleep(0.2)
+        dates = [(race_dt - timedelta(days=i)).strftime("%Y%m%d") for i in range(7)]
+
+        # 일자별 조회는 서로 독립적이므로 세션 커넥션 풀로 동시 요청 (동시 요청 수로 부하 제한)
+        with ThreadPoolExecutor(max_workers=config.SCRAPE_MAX_WORKERS) as pool:
+            dfs = list(pool.map(lambda d: self.fetch_training_data(train_date=d, meet=meet), dates))
+        all_data = [df for df in dfs if not df.empty]
 
         if all_data:
             final_df = pd.concat(all_data, ignore_index=True)
@@ -667,19 +779,14 @@ class KRAScraper:
                 "meet": meet,
                 "hrNo": horse_no
             }
+            self._ensure_warm()
             resp = self.session.get(url, params=params, timeout=5)
             resp.raise_for_status()
             
-            dfs = pd.read_html(StringIO(resp.text))
-            if not dfs:
-                return []
-                
-            # '순위'와 '경주명' 등이 있는 테이블 찾기
-            target_df = None
-            for df in dfs:
-                if "순위" in str(df.columns) and "경주명" in str(df.columns):
-                    target_df = df
-                    break
+            # '순위'와 '경주명' 헤더가 있는 테이블을 lxml 트리에서 먼저 고른 뒤 그 표만 DataFrame으로 변환
+            doc = lxml_html.fromstring(resp.text)
+            tables = doc.xpath('//table[not(.//table)][.//th[contains(., "순위")] and .//th[contains(., "경주명")]]')
+            target_df = _read_table(tables[0]) if tables else None
             
             if target_df is not None:
                 # 컬럼 매핑 (API 응답 키와 동일하게 맞춤)
@@ -713,11 +820,13 @@ class KRAScraper:
                 # S1F, G1F가 웹에 없을 경우 (보통 상세 팝업에 있음)
                 # 일단 있는 정보라도 리턴해야 '전적 없음'을 면함
                 
-                records = target_df.to_dict('records')
-                # API 포맷 호환성 보정
-                for r in records:
-                    if "rcDate" in r:
-                        r["rcDate"] = str(r["rcDate"]).replace("/", "").replace("-", "")
+                # API 포맷 호환성 보정 (행 dict 변환 전에 컬럼 단위로)
+                if "rcDate" in target_df.columns:
+                    target_df["rcDate"] = target_df["rcDate"].astype(str).str.replace("/", "").str.replace("-", "")
+                
+                # to_dict('records')의 셀 단위 박싱 대신 itertuples + zip으로 행 dict 생성
+                cols = list(target_df.columns)
+                records = [dict(zip(cols, row)) for row in target_df.itertuples(index=False, name=None)]
                         
                 print(f"  [Success] 웹 스크래핑 경주 기록 {len(records)}건 수집")
                 
@@ -808,6 +917,8 @@ class KRAScraper:
                     else:
                         if not df.empty:
                             print(f"  [Success] 경주 결과 {len(df)}건 수집 완료 (API)")
+                            # 하루 전체 조회(경주 미지정)면 완결 결과
+                            df.attrs["complete"] = race_no is None
                             return df
                             
             # If we are here, it means API failed or Date Mismatch occurred.
@@ -828,44 +939,36 @@ class KRAScraper:
         dividends = {"qui": 0.0, "trio": 0.0}
         
         # 일반적으로 3열 이상이고 "복승" 단어가 포함된 테이블 검색
+        # [Strategy] 고정 위치 가정 (Table 6 in debug logs) — Shape (4, 3) 아니면 바로 건너뜀
+        # 테이블 구조: Row 1 (Index 1) -> Col 1 (복승 배당), Row 2 -> Col 2 (삼복승 배당)
         for df in dfs:
+            if df.shape != (4, 3):
+                continue
+            val_qui = str(df.iat[1, 1])
+            val_trio = str(df.iat[2, 2])
+            
+            # [Check] 매출액 테이블(콤마 포함) 제외
+            if "," in val_qui or "," in val_trio:
+                continue
+            
+            # 숫자만 추출 (정규식)
             try:
-                # 텍스트로 변환하여 검색
-                text_content = df.to_string()
-                
-                # 복승 배당 파싱
-                # 테이블 구조: Row 1 (Index 1) -> Col 1 (복승 배당)
-                # 단, 정확한 위치는 가변적일 수 있으므로 키워드 검색 또는 고정 위치 시도
-                
-                # [Strategy] 고정 위치 가정 (Table 6 in debug logs)
-                # Shape (4, 3) 확인
-                if df.shape == (4, 3):
-                    val_qui = str(df.iloc[1, 1])
-                    val_trio = str(df.iloc[2, 2])
+                # Quinella
+                match_q = _NUM_RE.search(val_qui)
+                if match_q:
+                    dividends["qui"] = float(match_q.group(1))
                     
-                    # [Check] 매출액 테이블(콤마 포함) 제외
-                    if "," in val_qui or "," in val_trio:
-                        continue
-                    
-                    # 숫자만 추출 (정규식)
-                    import re
-                    
-                    # Quinella
-                    match_q = re.search(r"(\d+(\.\d+)?)", val_qui)
-                    if match_q:
-                        dividends["qui"] = float(match_q.group(1))
-                        
-                    # Trio
-                    match_t = re.search(r"(\d+(\.\d+)?)", val_trio)
-                    if match_t:
-                        dividends["trio"] = float(match_t.group(1))
-                        
-                    # 찾았으면 중단 (가장 유력한 테이블 하나만 봄)
-                    if dividends["qui"] > 0 or dividends["trio"] > 0:
-                        break
-            except Exception as e:
+                # Trio
+                match_t = _NUM_RE.search(val_trio)
+                if match_t:
+                    dividends["trio"] = float(match_t.group(1))
+            except ValueError:
                 continue
                 
+            # 찾았으면 중단 (가장 유력한 테이블 하나만 봄)
+            if dividends["qui"] > 0 or dividends["trio"] > 0:
+                break
+                
         return dividends
 
     def _scrape_results_full(self, race_date: str, meet: str) -> pd.DataFrame:
@@ -880,14 +983,14 @@ class KRAScraper:
                 "Referer": "https://race.kra.co.kr/raceScore/ScoretableScoreList.do"
             }
             
+            self._ensure_warm()
             resp = self.session.get(list_url, params=params, headers=headers, timeout=10)
             resp.raise_for_status()
             
             # 경주 번호(1, 2, 3...) 링크가 있는지 확인하여 최대 경주 수 파악
             # 예: onclick="ScoreDetailPopup('1','20240302','1');"
-            import re
-            pattern = r"ScoreDetailPopup\s*\(\s*['\"]" + str(meet) + r"['\"]\s*,\s*['\"]" + str(race_date) + r"['\"]\s*,\s*['\"](\d+)['\"]\s*\)"
-            matches = re.findall(pattern, resp.text)
+            matches = [no for m, d, no in _SCORE_POPUP_RE.findall(resp.text)
+                       if m == str(meet) and d == str(race_date)]
             
             if not matches:
                 print("  [Info] 경주 갯수 파악 실패 (패턴 매칭 없음). 1~12경주 순차 시도.")
@@ -897,118 +1000,25 @@ class KRAScraper:
                 race_nos = sorted(list(set(matches)), key=lambda x: int(x))
                 print(f"  [Info] 총 {len(race_nos)}개 경주 감지 ({race_nos})")
 
-            all_results = []
-            
-            # 2. 각 경주별 상세 성적 조회
-            detail_url = "https://race.kra.co.kr/raceScore/ScoretableDetailList.do"
-            
-            for rc_no in race_nos:
-                print(f"    - Scraping Race {rc_no}...")
-                post_data = {
-                    "meet": meet,
-                    "realRcDate": race_date,
-                    "realRcNo": rc_no
-                }
-                
-                try:
-                    resp_detail = self.session.post(detail_url, data=post_data, headers=headers, timeout=10)
-                    resp_detail.raise_for_status()
-                    resp_detail.encoding = 'euc-kr' # [Fix] Encoding
-                    
-                    dfs = pd.read_html(StringIO(resp_detail.text), flavor='lxml')
-                    
-                    # [Added] 배당률 파싱
-                    dividends = self._parse_dividend(dfs)
-                    
-                    target_df = None
-                    
-                    # 원하는 테이블 찾기: "순위", "마명" 포함
-                    for i, df in enumerate(dfs):
-                        cols = [str(c) for c in df.columns]
-                        if any("순위" in c for c in cols) and any("마명" in c for c in cols):
-                            target_df = df
-                            break
-                    
-                    if target_df is not None:
-                        # [Added] 고유 마번(hrId) 추출 (BeautifulSoup 필요)
-                        try:
-                            soup = BeautifulSoup(resp_detail.text, "html.parser")
-                            # 마명이 포함된 테이블 찾기
-                            tables = soup.find_all("table")
-                            hr_id_map = {}
-                            
-                            for tbl in tables:
-                                if "마명" in tbl.get_text():
-                                    links = tbl.find_all("a")
-                                    for lnk in links:
-                                        # onclick="FnPopHorseDetail('0033667', ...)"
-                                        onclick = lnk.get("onclick", "")
-                                        if "PopHorseDetail" in onclick:
-                                            # 마명 추출 (공백 제거)
-                                            name = lnk.get_text(strip=True)
-                                            # ID 추출
-                                            match = re.search(r"PopHorseDetail\s*\(\s*['\"](\d+)['\"]", onclick)
-                                            if match:
-                                                hr_id_map[name] = match.group(1)
-                            
-                            if hr_id_map:
-                                # target_df의 마명 컬럼 정리
-                                target_df["_clean_name"] = target_df["마명"].astype(str).str.strip().str.replace(r"\s+", "", regex=True)
-                                target_df["hrId"] = target_df["_clean_name"].map(lambda x: hr_id_map.get(x, ""))
-                                target_df.drop(columns=["_clean_name"], inplace=True)
-                                # print(f"      [Debug] Extracted {len(hr_id_map)} Unique IDs")
-                        except Exception as e:
-                            print(f"      [Warn] Unique ID extraction failed: {e}")
-
-                        # 경주 번호 컬럼 추가
-                        target_df["rcNo"] = rc_no
-                        
-                        # 컬럼 매핑 (공백/줄바꿈 제거 후)
-                        target_df.columns = [str(c).replace("\n", "").replace(" ", "") for c in target_df.columns]
-                        # [Added] 배당률 정보 추가
-                        target_df["qui_div"] = dividends.get("qui", 0.0)
-                        target_df["trio_div"] = dividends.get("trio", 0.0)
-
-                        # 전처리
-                        target_df = target_df.rename(columns={
-                            "순위": "ord", 
-                            "착순": "ord",
-                            "마번": "hrNo", 
-                            "마명": "hrName", 
-                            "산지": "prodName",
-                            "성별": "sex",
-                            "연령": "age",
-                            "중량": "wgBudam", "부담중량": "wgBudam",
-                            "기수명": "jkName", "기수": "jkName",
-                            "조교사명": "trName", "조교사": "trName",
-                            "마주명": "owName", "마주": "owName",
-                            "기록": "rcTime", "주행기록": "rcTime", "경주기록": "rcTime",
-                            "착차": "diff", 
-                            "마체중": "wgHr", "체중": "wgHr",
-                            "단승": "winOdds",
-                            "연승": "plcOdds",
-                            "S1F": "s1f", "G1F": "g1f", "G-1F": "g1f", "3C": "g3f", "4C": "g1f" # 근사 매핑
-                        })
-                        
-                        # 순위 데이터 정제 (취소, 중지 등 처리)
-                        if "ord" in target_df.columns:
-                            target_df["ord"] = pd.to_numeric(target_df["ord"], errors="coerce").fillna(99).astype(int)
-                            
-                        # 마번 정제
-                        if "hrNo" in target_df.columns:
-                            target_df["hrNo"] = pd.to_numeric(target_df["hrNo"], errors="coerce").fillna(0).astype(int).astype(str)
-
-                        all_results.append(target_df)
-                    else:
-                        print(f"      [Warn] Race {rc_no}: No result table found.")
-                        
-                    time.sleep(0.3) # 딜레이
-                    
-                except Exception as e:
-                    print(f"      [Error] Race {rc_no} scraping failed: {e}")
+            # 2. 각 경주별 상세 성적 조회 (네트워크 대기 위주 → 스레드 풀 병렬, 결과는 경주 순서 유지)
+            with ThreadPoolExecutor(max_workers=config.SCRAPE_MAX_WORKERS) as pool:
+                scraped = pool.map(lambda rc_no: self._scrape_one_race(race_date, meet, rc_no, headers), race_nos)
+                all_results = [df for df in scraped if df is not None]
 
             if all_results:
                 final_df = pd.concat(all_results, ignore_index=True)
+                # 남은 object(문자열) 컬럼은 Arrow 문자열로 (숫자 컬럼은 numpy 유지 — 하위 계산 호환)
+                obj_cols = final_df.columns[final_df.dtypes == object]
+                if len(obj_cols):
+                    final_df = final_df.astype({c: _STR_DTYPE for c in obj_cols})
+                # 감지된 전 경주 수집 + 경주마다 복승/삼복승 배당 확인 시에만 완결 표시
+                # (일부 경주 실패/배당표 누락 결과가 하루 결과로 영구 캐시되지 않도록)
+                final_df.attrs["complete"] = bool(
+                    matches and len(all_results) == len(race_nos)
+                    and (final_df.groupby("rcNo")[["qui_div", "trio_div"]].max() > 0).all(axis=None)
+                )
+                if not final_df.attrs["complete"]:
+                    print(f"  [Warn] 일부 경주 수집 실패 또는 배당 누락 ({len(all_results)}/{len(race_nos)}경주)")
                 print(f"  [Success] 총 {len(final_df)}건의 경주 성적 수집 완료")
                 return final_df
             
@@ -1018,6 +1028,104 @@ class KRAScraper:
             print(f"  [Error] 경주 결과 스크래핑 전체 실패: {e}")
             return pd.DataFrame()
 
+    def _scrape_one_race(self, race_date: str, meet: str, rc_no: str, headers: dict):
+        """경주성적표 상세 1개 경주 스크래핑 (결과 표 DataFrame, 실패 시 None)"""
+        detail_url = "https://race.kra.co.kr/raceScore/ScoretableDetailList.do"
+        
+        print(f"    - Scraping Race {rc_no}...")
+        post_data = {
+            "meet": meet,
+            "realRcDate": race_date,
+            "realRcNo": rc_no
+        }
+        
+        try:
+            resp_detail = self.session.post(detail_url, data=post_data, headers=headers, timeout=10)
+            resp_detail.raise_for_status()
+            # [Fix] Encoding: 바이트를 cp949(EUC-KR 상위 호환)로 한 번만 디코딩
+            html_text = resp_detail.content.decode('cp949', errors='replace')
+            
+            # 페이지는 lxml로 한 번만 파싱, 필요한 표만 골라 DataFrame으로 변환
+            doc = lxml_html.fromstring(html_text)
+            
+            # [Added] 배당률 파싱 (데이터 4행 표만 후보)
+            div_tables = doc.xpath('//table[not(.//table)][count(.//tr[td]) = 4]')
+            dividends = self._parse_dividend([_read_table(t) for t in div_tables])
+            
+            target_df = None
+            
+            # 원하는 테이블 찾기: "순위", "마명" 헤더 포함
+            result_tables = doc.xpath('//table[not(.//table)][.//th[contains(., "순위")] and .//th[contains(., "마명")]]')
+            if result_tables:
+                target_df = _read_table(result_tables[0])
+            
+            if target_df is not None:
+                # [Added] 고유 마번(hrId) 추출 (위에서 파싱한 lxml 트리 재사용)
+                try:
+                    # 결과 표 안의 마명 링크만 XPath 한 번으로 선택
+                    # onclick="FnPopHorseDetail('0033667', ...)" → {마명(공백 제거): 고유 마번}
+                    links = result_tables[0].xpath('.//a[contains(@onclick, "PopHorseDetail")]')
+                    hr_id_map = {
+                        _cell_text(lnk): m.group(1)
+                        for lnk in links
+                        if (m := _POP_HORSE_RE.search(lnk.get("onclick", "")))
+                    }
+                    
+                    if hr_id_map:
+                        # target_df의 마명 컬럼 정리
+                        # (Arrow 문자열 커널로 정리, 임시 컬럼 추가/삭제 없이 dict 매핑)
+                        clean_name = target_df["마명"].astype(_STR_DTYPE).str.strip().str.replace(r"\s+", "", regex=True)
+                        target_df["hrId"] = clean_name.map(hr_id_map).fillna("")
+                        # print(f"      [Debug] Extracted {len(hr_id_map)} Unique IDs")
+                except Exception as e:
+                    print(f"      [Warn] Unique ID extraction failed: {e}")
+
+                # 경주 번호 컬럼 추가
+                target_df["rcNo"] = rc_no
+                
+                # 컬럼 매핑 (공백/줄바꿈 제거 후)
+                target_df.columns = [str(c).replace("\n", "").replace(" ", "") for c in target_df.columns]
+                # [Added] 배당률 정보 추가
+                target_df["qui_div"] = dividends.get("qui", 0.0)
+                target_df["trio_div"] = dividends.get("trio", 0.0)
+
+                # 전처리
+                target_df = target_df.rename(columns={
+                    "순위": "ord", 
+                    "착순": "ord",
+                    "마번": "hrNo", 
+                    "마명": "hrName", 
+                    "산지": "prodName",
+                    "성별": "sex",
+                    "연령": "age",
+                    "중량": "wgBudam", "부담중량": "wgBudam",
+                    "기수명": "jkName", "기수": "jkName",
+                    "조교사명": "trName", "조교사": "trName",
+                    "마주명": "owName", "마주": "owName",
+                    "기록": "rcTime", "주행기록": "rcTime", "경주기록": "rcTime",
+                    "착차": "diff", 
+                    "마체중": "wgHr", "체중": "wgHr",
+                    "단승": "winOdds",
+                    "연승": "plcOdds",
+                    "S1F": "s1f", "G1F": "g1f", "G-1F": "g1f", "3C": "g3f", "4C": "g1f" # 근사 매핑
+                })
+                
+                # 순위 데이터 정제 (취소, 중지 등 처리)
+                if "ord" in target_df.columns:
+                    target_df["ord"] = _coerce_int_col(target_df["ord"], 99)
+                    
+                # 마번 정제
+                if "hrNo" in target_df.columns:
+                    target_df["hrNo"] = _coerce_int_col(target_df["hrNo"], 0).astype(str)
+
+                return target_df
+            else:
+                print(f"      [Warn] Race {rc_no}: No result table found.")
+            
+        except Exception as e:
+            print(f"      [Error] Race {rc_no} scraping failed: {e}")
+        return None
+
     # ─────────────────────────────────────────────
     # 5. 마체중 정보
     # ─────────────────────────────────────────────
@@ -1097,58 +1205,43 @@ class KRAScraper:
         """출전표의 각 마필에 대해 과거 3~5전 기록을 조회하여 s1f_1, ord_1 등의 컬럼으로 추가"""
         print(f"  [Enrich] 과거 성적 데이터 병합 시작 (총 {len(entries_df)}마리)")
         
-        enriched_rows = []
         if "hrNo" not in entries_df.columns:
             return entries_df
 
-        # 이미 처리한 마번 캐싱 (중복 방지)
-        history_cache = {}
-        # [Added-DarkHorse] 심판 리포트 캐싱 (date, rcNo) -> {hrName: report}
-        steward_db = {} 
+        # [Added-DarkHorse] 직전 경주 심판 리포트 조회 대상: (마필 순서, 경주일자, 경주번호, 마명)
+        # 루프에서는 키만 모으고, 루프 후 경주별 1회 수집 + 한 번의 merge로 채움
+        steward_lookups = []
 
         count = 0
         total = len(entries_df)
 
-        for idx, row in entries_df.iterrows():
-            # [Improvement] Unique ID(hrId)가 있으면 우선 사용, 없으면 마번(hrNo) 사용
-            # hrNo는 게이트 번호라 부정확하지만, hrId가 없는 경우 어쩔 수 없음
-            hr_id = str(row.get("hrId", ""))
-            gate_no = str(row.get("hrNo", ""))
-            
-            target_id = hr_id if hr_id and hr_id != "nan" else gate_no
+        # iterrows()의 행별 Series 생성 대신 튜플 → dict
+        cols = list(entries_df.columns)
+        rows = [dict(zip(cols, values)) for values in entries_df.itertuples(index=False, name=None)]
+
+        # 마필별 과거 전적은 중복 제거 후 스레드 풀로 동시 수집 (네트워크 대기 위주)
+        target_ids = [self._history_target_id(row) for row in rows]
+        unique_ids = [t for t in dict.fromkeys(target_ids) if t]
+        with ThreadPoolExecutor(max_workers=config.SCRAPE_MAX_WORKERS) as pool:
+            history_cache = dict(zip(unique_ids, pool.map(lambda t: self._fetch_history_records(t, meet), unique_ids)))
 
+        # 추가 컬럼은 컬럼별 리스트로 모아 마지막에 한 번에 붙임 (행 Series 누적 → DataFrame 재구성 없음)
+        new_cols = {}  # {컬럼명: [마필 순서별 값]}
+        for pos, (row, target_id) in enumerate(zip(rows, target_ids)):
             # 식별자가 없으면 스킵
-            if not target_id or target_id == "nan" or target_id == "0":
-                enriched_rows.append(row)
+            if not target_id:
                 continue
-                
-            if target_id in history_cache:
-                hist_df = history_cache[target_id]
-            else:
-                try:
-                    # 상세 정보 스크래핑 (list[dict] 반환)
-                    records = self._scrape_horse_details(target_id, meet)
-                    hist_df = pd.DataFrame(records) if records else pd.DataFrame()
-                except Exception as e:
-                    hist_df = pd.DataFrame()
-                
-                history_cache[target_id] = hist_df
-                time.sleep(0.1)
+            hist_records = history_cache[target_id]  # 최신순 정렬된 list[dict]
 
             # Merge into row
-            new_row = row.copy()
+            new_row = {}  # 이 마필에 추가할 컬럼 값
             
-            if not hist_df.empty:
-                if "rcDate" in hist_df.columns:
-                    hist_df["rcDate"] = hist_df["rcDate"].astype(str).str.replace("-", "").str.replace(".", "")
-                    hist_df = hist_df.sort_values("rcDate", ascending=False)
-                
+            if hist_records:
                 current_date = str(race_date).replace("-", "")
                 
                 valid_hist = []
-                steward_db = {} # (date, rcNo) -> {hrName: report_text}
 
-                for _, h_row in hist_df.iterrows():
+                for h_row in hist_records:
                     h_date = str(h_row.get("rcDate", ""))
                     if h_date < current_date:
                         valid_hist.append(h_row)
@@ -1162,29 +1255,10 @@ class KRAScraper:
                     l_no = str(last_race.get("rcNo", ""))
                     
                     if l_date and l_no:
-                        # 캐시 확인
-                        cache_key = (l_date, l_no)
-                        if cache_key not in steward_db:
-                            # 해당 경주의 리포트 전체 수집
-                            try:
-                                # meet는 동일하다고 가정 (서울->서울). 교차경주는 복잡하므로 일단 패스
-                                reports_map = self.scrape_steward_reports(l_date, meet, l_no)
-                                # hrName 기준으로 재매핑
-                                name_map = {}
-                                for _, r_list in reports_map.items():
-                                    for r in r_list:
-                                        # r = {'date':..., 'report':..., 'hrName':...}
-                                        name_map[r['hrName']] = r['report']
-                                steward_db[cache_key] = name_map
-                            except:
-                                steward_db[cache_key] = {}
-                        
-                        # 내 이름으로 리포트 찾기
+                        # 내 이름으로 리포트 찾기 (루프 후 일괄 채움, 컬럼 위치 확보용 빈 값)
                         my_name = str(row.get("hrName", "")).strip()
-                        if my_name in steward_db[cache_key]:
-                            new_row["steward_report_1"] = steward_db[cache_key][my_name]
-                        else:
-                            new_row["steward_report_1"] = ""
+                        steward_lookups.append((pos, l_date, l_no, my_name))
+                        new_row["steward_report_1"] = ""
 
                             
                 for i, h_row in enumerate(valid_hist, 1):
@@ -1193,27 +1267,102 @@ class KRAScraper:
                         val = h_row.get(col, "")
                         new_row[f"{col}_{i}"] = val
             
-            enriched_rows.append(new_row)
+            for key, val in new_row.items():
+                if key not in new_cols:
+                    # 기존 컬럼이면 원래 값 유지, 새 컬럼이면 NaN으로 시작
+                    new_cols[key] = entries_df[key].tolist() if key in cols else [float("nan")] * total
+                new_cols[key][pos] = val
             count += 1
             if count % 10 == 0:
                 print(f"    - {count}/{total} 처리 중...", end="\r")
 
+        if steward_lookups:
+            lookup_df = pd.DataFrame(steward_lookups, columns=["pos", "l_date", "l_no", "hrName"])
+            # 해당 경주의 리포트 전체 수집 (경주당 1회, 동시 요청)
+            race_keys = list(dict.fromkeys(zip(lookup_df["l_date"], lookup_df["l_no"])))
+            with ThreadPoolExecutor(max_workers=config.SCRAPE_MAX_WORKERS) as pool:
+                name_maps = pool.map(lambda k: self._steward_name_map(k[0], meet, k[1]), race_keys)
+                steward_df = pd.DataFrame(
+                    [(l_date, l_no, name, text)
+                     for (l_date, l_no), name_map in zip(race_keys, name_maps)
+                     for name, text in name_map.items()],
+                    columns=["l_date", "l_no", "hrName", "steward_report_1"],
+                )
+            merged = lookup_df.merge(steward_df, on=["l_date", "l_no", "hrName"], how="left")
+            reports = new_cols["steward_report_1"]
+            for pos, text in zip(merged["pos"], merged["steward_report_1"].fillna("")):
+                reports[pos] = text
+
         print(f"  [Enrich] 완료.                               ")
-        return pd.DataFrame(enriched_rows)
+        return entries_df.reset_index(drop=True).assign(**new_cols)
+
+    def _steward_name_map(self, l_date: str, meet: str, l_no: str) -> dict:
+        """해당 경주 심판 리포트를 마명 기준으로 재매핑 {hrName: report} (실패 시 빈 dict)"""
+        try:
+            # meet는 동일하다고 가정 (서울->서울). 교차경주는 복잡하므로 일단 패스
+            reports_map = self.scrape_steward_reports(l_date, meet, l_no)
+            name_map = {}
+            for r_list in reports_map.values():
+                for r in r_list:
+                    # r = {'date':..., 'report':..., 'hrName':...}
+                    name_map[r['hrName']] = r['report']
+            return name_map
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _history_target_id(row: dict):
+        """과거 전적 조회용 식별자 (없으면 None)"""
+        # [Improvement] Unique ID(hrId)가 있으면 우선 사용, 없으면 마번(hrNo) 사용
+        # hrNo는 게이트 번호라 부정확하지만, hrId가 없는 경우 어쩔 수 없음
+        hr_id = str(row.get("hrId", ""))
+        gate_no = str(row.get("hrNo", ""))
+        
+        target_id = hr_id if hr_id and hr_id != "nan" else gate_no
+        if not target_id or target_id == "nan" or target_id == "0":
+            return None
+        return target_id
+
+    def _fetch_history_records(self, target_id: str, meet: str) -> list[dict]:
+        """마필 상세 정보(과거 전적)를 경주일자 최신순으로 (실패 시 빈 리스트)
+        최근 5전 선택용이라 DataFrame 생성/정렬 없이 dict 리스트로 처리"""
+        try:
+            # 상세 정보 스크래핑 (list[dict] 반환)
+            records = self._scrape_horse_details(target_id, meet)
+        except Exception:
+            return []
+        if any("rcDate" in r for r in records):
+            for r in records:
+                r["rcDate"] = str(r.get("rcDate", float("nan"))).replace("-", "").replace(".", "")
+            records.sort(key=lambda r: r["rcDate"], reverse=True)
+        return records
 
     def _save_cache(self, race_date: str, meet: str, data: dict):
-        """수집 데이터를 CSV 캐시로 저장"""
+        """수집 데이터를 캐시로 저장 (pyarrow 있으면 Parquet — dtype 보존/고속, 실패 시 CSV)"""
         cache_dir = os.path.join(config.DATA_DIR, f"{race_date}_{meet}")
         os.makedirs(cache_dir, exist_ok=True)
 
         for key, df in data.items():
             if isinstance(df, pd.DataFrame) and not df.empty:
-                path = os.path.join(cache_dir, f"{key}.csv")
-                df.to_csv(path, index=False, encoding="utf-8-sig")
+                base = os.path.join(cache_dir, key)
+                path = None
+                if _HAS_PYARROW:
+                    try:
+                        df.to_parquet(base + ".parquet", index=False, compression="zstd")
+                        path = base + ".parquet"
+                    except Exception as e:  # 문자/숫자 혼합 컬럼 등
+                        print(f"  [Warn] Parquet 저장 실패 ({key}): {e} → CSV로 저장")
+                if path is None:
+                    path = base + ".csv"
+                    df.to_csv(path, index=False, encoding="utf-8-sig")
+                # 다른 형식의 이전 캐시 제거 (로드 시 오래된 파일 우선 방지)
+                stale = base + (".csv" if path.endswith(".parquet") else ".parquet")
+                if os.path.exists(stale):
+                    os.remove(stale)
                 print(f"  💾 캐시 저장: {path}")
 
     def load_cache(self, race_date: str, meet: str) -> dict:
-        """캐시된 데이터 로드"""
+        """캐시된 데이터 로드 (Parquet 우선, 없으면 기존 CSV 캐시)"""
         cache_dir = os.path.join(config.DATA_DIR, f"{race_date}_{meet}")
         data = {}
 
@@ -1221,10 +1370,14 @@ class KRAScraper:
             return data
 
         for name in ["entries", "training", "results", "weights"]:
-            path = os.path.join(cache_dir, f"{name}.csv")
-            if os.path.exists(path):
-                data[name] = pd.read_csv(path, encoding="utf-8-sig")
-                print(f"  📂 캐시 로드: {name} ({len(data[name])}건)")
+            base = os.path.join(cache_dir, name)
+            if _HAS_PYARROW and os.path.exists(base + ".parquet"):
+                data[name] = pd.read_parquet(base + ".parquet")
+            elif os.path.exists(base + ".csv"):
+                data[name] = pd.read_csv(base + ".csv", encoding="utf-8-sig")
+            else:
+                continue
+            print(f"  📂 캐시 로드: {name} ({len(data[name])}건)")
 
         return data
 
@@ -1,14 +1,194 @@
+import logging
+import os
+import shutil
+import numpy as np
 import pandas as pd
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-import time
+import config
 from kra_scraper import KRAScraper
 
+logger = logging.getLogger(__name__)
+
+# 결과 캐시는 Parquet (pyarrow 없으면 캐시 없이 매번 수집), 문자열 컬럼은 Arrow 문자열
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+    _STR_DTYPE = "string[pyarrow]"
+except ImportError:
+    _HAS_PYARROW = False
+    _STR_DTYPE = "string"
+
+# 우승마 컬럼 → 결과 컬럼명, 없는 컬럼/결측값의 기본값
+_WINNER_COLS = {
+    'hrName': 'w_name', 'hrNo': 'w_no', 'winOdds': 'w_odds', 'wgBudam': 'w_weight',
+    'weight': 'w_body', 'rating': 'w_rating', 'jkName': 'w_jockey', 'trName': 'w_trainer',
+}
+_WINNER_DEFAULTS = {
+    'w_name': '?', 'w_no': '?', 'w_odds': 0, 'w_weight': 0,
+    'w_body': 0, 'w_rating': 0, 'w_jockey': '?', 'w_trainer': '?',
+}
+_RESULT_COLS = [
+    "date", "meet", "race", "qui_div", "trio_div", "w_name", "w_no", "w_odds", "w_odds_rank",
+    "fav1_ord", "entry_count", "w_weight", "w_body", "w_rating", "w_jockey", "w_trainer",
+]
+# 분석에 쓰는 경주 결과 컬럼 (조회 직후 나머지는 버림)
+_SOURCE_COLS = ('rcNo', 'ord', 'qui_div', 'trio_div', *_WINNER_COLS)
+_RESULT_CATEGORY_COLS = ("meet", "w_name", "w_no", "w_jockey", "w_trainer")
+
+
+def _compact_result_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """고배당 경주 결과 숫자 컬럼 다운캐스트 + 반복 문자열 컬럼 category 변환 (메모리 절감, value_counts 가속)"""
+    for col in df.select_dtypes("number").columns:
+        kind = "integer" if pd.api.types.is_integer_dtype(df[col]) else "float"
+        df[col] = pd.to_numeric(df[col], downcast=kind)
+    for col in _RESULT_CATEGORY_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    # 나머지 object 문자열 컬럼(date, race)은 Arrow 문자열로
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype(_STR_DTYPE)
+    return df
+
+
+def _top_counts(s: pd.Series, n: int = 5) -> dict:
+    """상위 n개 값의 빈도 dict (category는 코드 bincount 한 번으로 해시 없이 집계)"""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+        counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(s.cat.categories)), index=s.cat.categories)
+        return counts[counts > 0].nlargest(n).to_dict()
+    return s.groupby(s, sort=False, observed=True).size().nlargest(n).to_dict()
+
 class PatternAnalyzer:
     """고배당 패턴 분석기 (Web Integration Version)"""
     
     def __init__(self):
         self.scraper = KRAScraper()
         
+    # ─────────────────────────────────────────────
+    # 경주 결과 디스크 캐시 (지난 경주 결과는 변하지 않음)
+    # ─────────────────────────────────────────────
+    @staticmethod
+    def _cache_path(date_str, meet):
+        return os.path.join(config.RESULTS_CACHE_DIR, f"{date_str}_{meet}.parquet")
+
+    def _cache_get(self, date_str, meet):
+        """캐시된 경주 결과 로드 (없거나 손상/완결 표시 없는 이전 캐시면 None)"""
+        path = self._cache_path(date_str, meet)
+        if not _HAS_PYARROW or not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except Exception:
+            return None
+        return df if df.attrs.get("complete") else None
+
+    def _cache_put(self, date_str, meet, df):
+        """경주 결과 캐시 저장 — 확정된 과거(어제 이전) 결과만, 실패해도 분석 흐름에는 영향 없음"""
+        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y%m%d")
+        # 빈 결과/일부 경주 누락 결과(스크래퍼가 완결 표시 안 함)는 일시적 수집 실패일 수 있으므로 저장하지 않음
+        if (not _HAS_PYARROW or df is None or df.empty or not df.attrs.get("complete")
+                or date_str >= yesterday):
+            return
+        try:
+            os.makedirs(config.RESULTS_CACHE_DIR, exist_ok=True)
+            df.to_parquet(self._cache_path(date_str, meet), index=False, compression="zstd")
+        except Exception as e:  # 문자/숫자 혼합 컬럼 등
+            logger.warning("경주 결과 캐시 저장 실패 (%s_%s): %s", date_str, meet, e)
+
+    def clear_cache(self):
+        """경주 결과 캐시 전체 삭제 (디버깅용)"""
+        shutil.rmtree(config.RESULTS_CACHE_DIR, ignore_errors=True)
+
+    def _fetch_results(self, date_str, meet):
+        """경주 결과 조회 (캐시 우선, 없으면 수집 후 캐시 저장) — 분석에 쓰는 컬럼만 남김"""
+        df = self._cache_get(date_str, meet)
+        if df is None:
+            df = self.scraper.fetch_race_results(date_str, meet)
+            if df is not None:
+                df = df[[c for c in _SOURCE_COLS if c in df.columns]]
+            self._cache_put(date_str, meet, df)
+            return df
+        return df[[c for c in _SOURCE_COLS if c in df.columns]]
+
+    def _analyze_day(self, date_str, meet):
+        """
+        (일자, 경마장) 1건 조회 + 고배당 경주 추출 (워커 스레드에서 실행)
+        원본 결과 표는 여기서 버리고 작은 추출 결과만 반환 → 최대 메모리는 고배당 경주 수에 비례
+        
+        Returns:
+            tuple: (조회 성공 여부, 고배당 경주 수, 우승마 분석 DataFrame — 없으면 None)
+        """
+        try:
+            df = self._fetch_results(date_str, meet)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("경주 결과 조회 실패 (%s_%s): %s", date_str, meet, e)
+            return False, 0, None
+        if df is None or df.empty:
+            return False, 0, None
+        hits, races = self._find_high_div_races(df, date_str, meet)
+        return True, hits, races
+
+    def _find_high_div_races(self, df, date_str, meet):
+        """
+        하루(1개 경마장) 경주 결과에서 고배당 경주 추출 (경주별 groupby 집계로 일괄 처리)
+        
+        Returns:
+            tuple: (고배당 경주 수, 우승마 분석 DataFrame — 없으면 None)
+        """
+        if not {'qui_div', 'trio_div', 'rcNo'}.issubset(df.columns):
+            return 0, None
+        
+        # 배당/착순 컬럼은 숫자로 (API 문자열 응답 대비, 변환 불가 값은 결측) → 이후 비교/집계에서 예외 없음
+        df = df.dropna(subset=['rcNo']).assign(**{
+            c: pd.to_numeric(df[c], errors='coerce')
+            for c in ('qui_div', 'trio_div', 'ord', 'winOdds') if c in df.columns
+        })
+        
+        # 경주별 최고 배당 / 출전 두수
+        agg = df.groupby('rcNo', sort=False, observed=True).agg(
+            q_max=('qui_div', 'max'), t_max=('trio_div', 'max'), entry_count=('rcNo', 'size'),
+        )
+        hits = agg[(agg['q_max'] >= 50.0) | (agg['t_max'] >= 100.0)]
+        hit_count = len(hits)
+        if hits.empty or not {'ord', 'winOdds', 'hrNo'}.issubset(df.columns):
+            return hit_count, None
+            
+        # [NEW] 인기마 부진 분석
+        # winOdds 기준 경주 내 인기 순위 (동률은 먼저 나온 마필 우선, 결측은 최하위)
+        odds_rank = df.groupby('rcNo', sort=False, observed=True)['winOdds'].rank(method='first', na_option='bottom').astype(int)
+        fav1_ord = df.loc[odds_rank == 1].set_index('rcNo')['ord']
+        
+        # Analyze Winner (Rank 1) — 경주별 첫 번째 1착마
+        is_winner = df['ord'] == 1
+        winners = (df[is_winner].assign(odds_rank=odds_rank[is_winner])
+                   .drop_duplicates('rcNo').set_index('rcNo'))
+        hits = hits[hits.index.isin(winners.index)]
+        if hits.empty:
+            return hit_count, None
+        w = winners.loc[hits.index]
+        
+        # 우승마의 인기 순위 (winOdds가 0/결측인 경우(스크래핑 실패 등)는 0)
+        w_odds_rank = w['odds_rank'].where(w['winOdds'] > 0, 0)
+        
+        # 우승마 정보 한 번에 추출 (컬럼명 변경 + 기본값 일괄 채움)
+        winner_info = w[[c for c in _WINNER_COLS if c in w.columns]].rename(columns=_WINNER_COLS)
+        winner_info = winner_info.fillna(_WINNER_DEFAULTS).assign(
+            **{k: v for k, v in _WINNER_DEFAULTS.items() if k not in winner_info.columns}
+        )
+        
+        result = (
+            hits.rename(columns={'q_max': 'qui_div', 't_max': 'trio_div'})
+            .assign(
+                date=date_str, meet=meet, w_odds_rank=w_odds_rank,
+                fav1_ord=fav1_ord.reindex(hits.index).fillna(99).astype(int),
+            )
+            .join(winner_info)
+            .rename_axis('race').reset_index()[_RESULT_COLS]
+        )
+        return hit_count, result
+        
     def run_analysis(self, days=90, progress_callback=None):
         """
         최근 N일간의 고배당 경주 분석
@@ -27,107 +207,55 @@ class PatternAnalyzer:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        high_div_races = []
         analyzed_count = 0
         hit_count = 0
         
-        # Calculate total days to scan (Approximate for progress bar)
-        # We only scan Fri/Sat/Sun
-        total_days = (end_date - start_date).days
-        scanned_days = 0
+        # 조회 대상 (일자, 경마장) 목록을 먼저 만든 뒤 병렬 수집 (최근 날짜 우선)
+        # We only scan Fri/Sat/Sun — Meets: Fri(2,3), Sat(1,3), Sun(1,2)
+        meets_by_weekday = {4: ["2", "3"], 5: ["1", "3"], 6: ["1", "2"]}
+        days_range = pd.date_range(start_date.date(), end_date.date(), freq="D")[::-1]
+        scan_days = days_range[days_range.weekday.isin(list(meets_by_weekday))]  # 0=Mon, ... 4=Fri, 5=Sat, 6=Sun
+        targets = [(d.strftime("%Y%m%d"), meet) for d in scan_days for meet in meets_by_weekday[d.weekday()]]
         
-        current = end_date
-        while current >= start_date:
-            weekday = current.weekday() # 0=Mon, ... 4=Fri, 5=Sat, 6=Sun
-            
-            if weekday in [4, 5, 6]: 
-                date_str = current.strftime("%Y%m%d")
-                
-                # Meets: Fri(2,3), Sat(1,3), Sun(1,2)
-                meets = []
-                if weekday == 4: meets = ["2", "3"]
-                elif weekday == 5: meets = ["1", "3"]
-                elif weekday == 6: meets = ["1", "2"]
+        # 네트워크 대기 위주 → 스레드 풀로 동시 조회, 완료되는 대로 메인 스레드에서 분석/진행률 갱신
+        # (결과는 원래 순서(최근 날짜 우선)로 합치기 위해 대상 인덱스 자리에 보관)
+        frames = [None] * len(targets)
+        done_count = 0
+        with ThreadPoolExecutor(max_workers=config.PATTERN_MAX_WORKERS) as pool:
+            futures = {
+                pool.submit(self._analyze_day, date_str, meet): idx
+                for idx, (date_str, meet) in enumerate(targets)
+            }
+            for future in as_completed(futures):
+                idx = futures[future]
+                date_str, meet = targets[idx]
+                # Fetch Results (워커에서 조회/추출 완료, 수집 오류는 워커에서 처리)
+                analyzed, hits, races = future.result()
+                analyzed_count += analyzed
+                hit_count += hits
+                if races is not None and not races.empty:
+                    frames[idx] = races
                 
-                for meet in meets:
-                    try:
-                        # Fetch Results
-                        df = self.scraper.fetch_race_results(date_str, meet)
-                        if df is None or df.empty:
-                            continue
-                            
-                        analyzed_count += 1
-                        
-                        if 'qui_div' in df.columns and 'rcNo' in df.columns:
-                            groups = df.groupby('rcNo')
-                            for rc_no, group in groups:
-                                q_max = group['qui_div'].max()
-                                t_max = group['trio_div'].max()
-                                
-                                if q_max >= 50.0 or t_max >= 100.0:
-                                    hit_count += 1
-                                    
-                                    # Analyze Winner (Rank 1)
-                                    winner = group[group['ord'] == 1]
-                                    if not winner.empty:
-                                        w_row = winner.iloc[0]
-                                        
-                                        # [NEW] 인기마 부진 분석
-                                        # winOdds 기준 인기 순위 정렬
-                                        try:
-                                            sorted_group = group.sort_values(by='winOdds')
-                                            fav1 = sorted_group.iloc[0] if len(sorted_group) > 0 else None
-                                            
-                                            # 우승마의 인기 순위 (winOdds 기준)
-                                            # winOdds가 0인 경우(스크래핑 실패 등)를 대비해 처리
-                                            if w_row.get('winOdds', 0) > 0:
-                                                w_odds_rank = (sorted_group['hrNo'].astype(str) == str(w_row['hrNo'])).values.argmax() + 1
-                                            else:
-                                                w_odds_rank = 0
-                                                
-                                            high_div_races.append({
-                                                "date": date_str,
-                                                "meet": meet,
-                                                "race": rc_no,
-                                                "qui_div": q_max,
-                                                "trio_div": t_max,
-                                                "w_name": w_row.get('hrName', '?'),
-                                                "w_no": w_row.get('hrNo', '?'),
-                                                "w_odds": w_row.get('winOdds', 0),
-                                                "w_odds_rank": w_odds_rank,
-                                                "fav1_ord": fav1.get('ord', 99) if fav1 is not None else 99,
-                                                "entry_count": len(group),
-                                                "w_weight": w_row.get('wgBudam', 0),
-                                                "w_body": w_row.get('weight', 0),
-                                                "w_rating": w_row.get('rating', 0),
-                                                "w_jockey": w_row.get('jkName', '?'),
-                                                "w_trainer": w_row.get('trName', '?')
-                                            })
-                                        except Exception:
-                                            continue
-                    except Exception:
-                        pass # Ignore errors during scraping to keep going
-            
-            # Update Progress
-            scanned_days += 1
-            if progress_callback:
-                progress = min(scanned_days / total_days, 1.0)
-                progress_callback(progress, f"{current.strftime('%Y-%m-%d')} 데이터 분석 중... ({hit_count}건 발견)")
-
-            current -= timedelta(days=1)
-            time.sleep(0.1) # UI 응답성 확보
+                # Update Progress
+                done_count += 1
+                if progress_callback:
+                    progress = min(done_count / len(targets), 1.0)
+                    progress_callback(progress, f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]} 데이터 분석 중... ({hit_count}건 발견)")
+        
+        frames = [f for f in frames if f is not None]
 
         # Finalize
-        if high_div_races:
-            df = pd.DataFrame(high_div_races)
+        if frames:
+            df = _compact_result_dtypes(pd.concat(frames, ignore_index=True))
+            means = df.agg({'qui_div': 'mean', 'trio_div': 'mean', 'w_odds_rank': 'mean'})
             summary = {
-                "avg_qui": df['qui_div'].mean(),
-                "avg_trio": df['trio_div'].mean(),
-                "avg_w_odds_rank": df['w_odds_rank'].mean(), # 우승마 평균 인기순위 (높을수록 의외의 결과)
-                "fav1_out_rate": (df['fav1_ord'] > 3).mean() * 100, # 인기 1위마 탈락률
-                "top_jockeys": df['w_jockey'].value_counts().head(5).to_dict(),
-                "top_trainers": df['w_trainer'].value_counts().head(5).to_dict(),
-                "weight_dist": df['w_weight'].value_counts().head(5).to_dict()
+                "avg_qui": means['qui_div'],
+                "avg_trio": means['trio_div'],
+                "avg_w_odds_rank": means['w_odds_rank'], # 우승마 평균 인기순위 (높을수록 의외의 결과)
+                "fav1_out_rate": (df['fav1_ord'].to_numpy() > 3).mean() * 100, # 인기 1위마 탈락률
+                "top_jockeys": _top_counts(df['w_jockey']),
+                "top_trainers": _top_counts(df['w_trainer']),
+                "weight_dist": _top_counts(df['w_weight'])
             }
             msg = f"총 {analyzed_count}개 경마일 조회, {hit_count}개 고배당 경주พบ"
             return {"high_div_races": df, "summary": summary, "msg": msg}
@@ -6,17 +6,99 @@ quantitative_analysis.py — 정량 분석 엔진
   3. 체중 VETO 판정
   4. 조교 점수
 """
+import re
+
 import numpy as np
 import pandas as pd
 
 import config
 
+# pyahocorasick 있으면 키워드 전체를 Aho-Corasick 오토마톤 한 번의 선형 스캔으로 검출 (없으면 정규식)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# 심판리포트 방해 키워드와 가중치
+_INTERFERENCE_KEYWORDS = {
+    "꼬리": 3,          # 꼬리감기 (진로방해로 인한)
+    "진로": 3,          # 진로 미확보/방해
+    "불이익": 4,        # 직접적 불이익
+    "밀려": 3,          # 밀려남
+    "부딪": 4,          # 충돌
+    "협착": 5,          # 협착 (심각한 방해)
+    "낙마": 5,          # 낙마
+    "주행방해": 4,      # 명시적 주행방해
+    "능력 발휘": 3,    # 능력 발휘 못함
+    "급감속": 3,        # 급감속
+    "불리한": 3,        # 불리한 주행
+}
+# 관련 없는 키워드 (벌칙/경고 등 - 해당 마필이 가해자인 경우)
+_PENALTY_KEYWORDS = ["경고", "벌칙", "제재", "과태료", "기승정지"]
+
+# 키워드 전체를 한 번의 스캔으로 찾는 정규식 (리포트마다 키워드별 `in` 반복 탐색 제거)
+_INTERFERENCE_RE = re.compile("|".join(map(re.escape, _INTERFERENCE_KEYWORDS)))
+_PENALTY_RE = re.compile("|".join(map(re.escape, _PENALTY_KEYWORDS)))
+
+# 주파기록(rcTime) 노이즈 제거용 — 숫자, 점, 콜론만 남김 (예: "1:13.4(3)" → "1:13.4")
+_RCTIME_RE = re.compile(r"[^0-9.:]")
+
+
+def _parse_rctime(text: str) -> float:
+    """주파기록 "1:13.4" / "73.4" → 초 단위 (해석 불가 시 0.0)"""
+    cleaned = _RCTIME_RE.sub("", text)
+    try:
+        if ":" in cleaned:
+            pts = cleaned.split(":")
+            if len(pts) != 2:
+                return 0.0
+            return float(pts[0]) * 60 + float(pts[1])
+        return float(cleaned)
+    except ValueError:
+        return 0.0
+
+
+def _build_keyword_automaton():
+    """방해/벌칙 키워드를 (구분, 키워드) 태그로 합친 오토마톤 (pyahocorasick 없으면 None)"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for kw in _INTERFERENCE_KEYWORDS:
+        automaton.add_word(kw, ("interference", kw))
+    for kw in _PENALTY_KEYWORDS:
+        automaton.add_word(kw, ("penalty", kw))
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
+def _scan_report(report_text: str) -> tuple[set, bool]:
+    """리포트 1건 키워드 검출 → (방해 키워드 집합, 벌칙 관련 여부)"""
+    if _KEYWORD_AUTOMATON is not None:
+        found, is_penalty = set(), False
+        for _, (kind, kw) in _KEYWORD_AUTOMATON.iter(report_text):
+            if kind == "penalty":
+                is_penalty = True
+            else:
+                found.add(kw)
+        return found, is_penalty
+    return set(_INTERFERENCE_RE.findall(report_text)), _PENALTY_RE.search(report_text) is not None
+
+
+def _hr_no_sort_key(hr_no: str) -> int:
+    """마번 정렬 키 (숫자 아닌 마번은 뒤로)"""
+    return int(hr_no) if hr_no.isdigit() else 99
+
 
 class QuantitativeAnalyzer:
     """경마 정량 분석 엔진"""
 
     def __init__(self, **kwargs):
         self.position_weights = kwargs.get('position_weights', config.POSITION_WEIGHTS)
+        # 코너 매칭용 (키, 점수) 튜플 — 경주마다 dict 뷰 생성/순회 방지
+        self._pw_items = tuple(self.position_weights.items())
         self.w_bonus = kwargs.get('w_bonus', config.W_BONUS_ON_PLACEMENT)
         self.weight_threshold = kwargs.get('weight_threshold', config.WEIGHT_VETO_THRESHOLD)
         self.train_min = kwargs.get('train_min', config.TRAINING_MIN_COUNT)
@@ -52,13 +134,18 @@ class QuantitativeAnalyzer:
 
         recent = race_history[:self.recent_n]
 
-        s1f_vals = [float(r.get("s1f", 0)) for r in recent if r.get("s1f")]
-        g1f_vals = [float(r.get("g1f", 0)) for r in recent if r.get("g1f")]
+        # (N, 2) 배열 [S1F, G1F] 한 번에 구성 — 기록 없음(0/None/"")은 NaN으로 두고 열별 일괄 집계
+        vals = np.array([(r.get("s1f") or np.nan, r.get("g1f") or np.nan) for r in recent], dtype=np.float64)
+        valid = ~np.isnan(vals)
+        n_vals = valid.sum(axis=0)
+        filled = np.where(valid, vals, 0.0)
+        avg = np.divide(filled.sum(axis=0), n_vals, out=np.zeros(2), where=n_vals > 0)
+        sq_dev = (np.where(valid, filled - avg, 0.0) ** 2).sum(axis=0)
+        std = np.sqrt(np.divide(sq_dev, n_vals, out=np.zeros(2), where=n_vals > 1))
 
-        s1f_avg = np.mean(s1f_vals) if s1f_vals else 0
-        s1f_std = np.std(s1f_vals) if len(s1f_vals) > 1 else 0
-        g1f_avg = np.mean(g1f_vals) if g1f_vals else 0
-        g1f_std = np.std(g1f_vals) if len(g1f_vals) > 1 else 0
+        s1f_avg, g1f_avg = avg
+        s1f_std, g1f_std = std
+        has_s1f, has_g1f = n_vals > 0
 
         # G1F 벡터 판정: 종반 속도와 초반 속도 비교
         if s1f_avg > 0 and g1f_avg > 0:
@@ -78,25 +165,7 @@ class QuantitativeAnalyzer:
         # [FALLBACK] S1F/G1F가 없을 경우, 총 주파기록(rcTime)으로 대체 평가
         # rcTime 포맷: "1:13.4" 또는 "73.4"
         if s1f_avg == 0 and g1f_avg == 0:
-            import re
-            rc_times = []
-            for r in recent:
-                rt = str(r.get("rcTime", "0"))
-                # [FIX] "1:13.4(3)" 같은 노이즈 제거 (숫자, 점, 콜론만 남김)
-                rt_clean = re.sub(r"[^0-9.:]", "", rt)
-                
-                if ":" in rt_clean:
-                    try:
-                        pts = rt_clean.split(":")
-                        if len(pts) == 2:
-                            val = float(pts[0]) * 60 + float(pts[1])
-                            if val > 0: rc_times.append(val)
-                    except: pass
-                else:
-                    try: 
-                        val = float(rt_clean)
-                        if val > 0: rc_times.append(val)
-                    except: pass
+            rc_times = [t for t in (_parse_rctime(str(r.get("rcTime", "0"))) for r in recent) if t > 0]
             
             if rc_times:
                 avg_time = np.mean(rc_times)
@@ -123,9 +192,9 @@ class QuantitativeAnalyzer:
                 speed_score += 8
 
             # 편차가 작을수록 안정적 → 보너스
-            if s1f_std < 0.3 and s1f_vals:
+            if s1f_std < 0.3 and has_s1f:
                 speed_score += 5
-            if g1f_std < 0.3 and g1f_vals:
+            if g1f_std < 0.3 and has_g1f:
                 speed_score += 5
 
         return {
@@ -172,7 +241,7 @@ class QuantitativeAnalyzer:
             # 입상(1~3위) 시에만 포지션 가중치 부여
             if ord_val <= 3:
                 # 코너 통과 포지션 점수
-                for key, pts in self.position_weights.items():
+                for key, pts in self._pw_items:
                     if key in corner:
                         race_score += pts
                         break
@@ -305,54 +374,33 @@ class QuantitativeAnalyzer:
                 "details": []
             }
         
-        # 방해 키워드와 가중치
-        interference_keywords = {
-            "꼬리": 3,          # 꼬리감기 (진로방해로 인한)
-            "진로": 3,          # 진로 미확보/방해
-            "불이익": 4,        # 직접적 불이익
-            "밀려": 3,          # 밀려남
-            "부딪": 4,          # 충돌
-            "협착": 5,          # 협착 (심각한 방해)
-            "낙마": 5,          # 낙마
-            "주행방해": 4,      # 명시적 주행방해
-            "능력 발휘": 3,    # 능력 발휘 못함
-            "급감속": 3,        # 급감속
-            "불리한": 3,        # 불리한 주행
-        }
-        
-        # 관련 없는 키워드 (벌칙/경고 등 - 해당 마필이 가해자인 경우)
-        penalty_keywords = ["경고", "벌칙", "제재", "과태료", "기승정지"]
+        # 과거 기록을 경주일 기준으로 1회 색인 (리포트마다 전체 기록 탐색 방지, 같은 날짜는 앞선 기록 우선)
+        race_by_date = {}
+        for race in race_history:
+            race_by_date.setdefault(str(race.get("rcDate", "")), race)
         
         details = []
         total_score = 0
         interference_count = 0
+        strong_g1f_count = 0  # 끝걸음 강함(G1F≤13.0) 동반 방해 건수
         
         for rpt in steward_reports:
             report_text = rpt.get("report", "")
             report_date = rpt.get("date", "")
             
-            # 벌칙 관련이면 건너뜀 (가해자 → 방해받은 게 아님)
-            is_penalty = any(pk in report_text for pk in penalty_keywords)
-            
-            # 방해 키워드 검출
-            matched_keywords = []
-            keyword_score = 0
-            for kw, weight in interference_keywords.items():
-                if kw in report_text:
-                    matched_keywords.append(kw)
-                    keyword_score += weight
+            # 방해 키워드 검출 + 벌칙 관련 여부 (가해자 → 방해받은 게 아님) — 한 번의 스캔
+            found, is_penalty = _scan_report(report_text)
+            # 결과는 키워드 정의 순서
+            matched_keywords = [kw for kw in _INTERFERENCE_KEYWORDS if kw in found]
+            keyword_score = sum(_INTERFERENCE_KEYWORDS[kw] for kw in matched_keywords)
             
             if matched_keywords and not is_penalty:
                 interference_count += 1
                 # 해당 경주의 G1F 찾기 (날짜 매칭)
-                g1f_at_race = 0
-                for race in race_history:
-                    rc_date = str(race.get("rcDate", ""))
-                    # 날짜 형식 통일 비교 ("2025/01/11-5R" vs "20250111")
-                    rpt_date_clean = report_date.replace("/", "").split("-")[0]
-                    if rc_date == rpt_date_clean:
-                        g1f_at_race = float(race.get("g1f", 0) or 0)
-                        break
+                # 날짜 형식 통일 비교 ("2025/01/11-5R" vs "20250111")
+                rpt_date_clean = report_date.replace("/", "").split("-")[0]
+                race = race_by_date.get(rpt_date_clean)
+                g1f_at_race = float(race.get("g1f", 0) or 0) if race is not None else 0
                 
                 # G1F가 빠를수록 끝걸음 살아있음 → 방해만 아니면 좋은 결과였을 것
                 g1f_bonus = 0
@@ -367,6 +415,8 @@ class QuantitativeAnalyzer:
                     elif g1f_at_race <= 13.5:
                         g1f_bonus = 3  # 보통 끝걸음
                         g1f_note = f"[끝걸음 양호 G1F={g1f_at_race}]"
+                if 0 < g1f_at_race <= 13.0:
+                    strong_g1f_count += 1
                 
                 race_score = min(keyword_score + g1f_bonus, 15)  # 1건당 최대 15
                 total_score += race_score
@@ -386,9 +436,7 @@ class QuantitativeAnalyzer:
         is_dark_horse = False
         dark_horse_reason = ""
         
-        strong_g1f_interferences = [d for d in details if d["g1f"] > 0 and d["g1f"] <= 13.0]
-        
-        if len(strong_g1f_interferences) >= 1:
+        if strong_g1f_count >= 1:
             is_dark_horse = True
             dark_horse_reason = f"방해 {interference_count}회 + 끝걸음 살아있음 (G1F≤13.0)"
         elif interference_count >= 2:
@@ -550,11 +598,13 @@ class QuantitativeAnalyzer:
             return {"axis": [], "partners": [], "combinations": [],
                     "num_bets": 0, "dark_horses": [], "summary": "출전마 부족"}
         
-        # 마번 매핑
+        # 마번 매핑 (iterrows 대신 열 단위로 한 번에 구성)
         hr_no_map = {}
         if entries_df is not None and not entries_df.empty:
-            for _, row in entries_df.iterrows():
-                hr_no_map[str(row.get("hrName", ""))] = str(row.get("hrNo", ""))
+            n_rows = len(entries_df)
+            names = [str(v) for v in entries_df["hrName"].tolist()] if "hrName" in entries_df.columns else [""] * n_rows
+            nos = [str(v) for v in entries_df["hrNo"].tolist()] if "hrNo" in entries_df.columns else [""] * n_rows
+            hr_no_map = dict(zip(names, nos))
         
         def get_hr_no(horse):
             no = hr_no_map.get(horse.get("horse_name", ""), "")
@@ -609,7 +659,7 @@ class QuantitativeAnalyzer:
                 if hr_no not in axis and hr_no not in challengers:
                     partners_set.add(hr_no)
         
-        partners = sorted(list(partners_set), key=lambda x: int(x) if x.isdigit() else 99)
+        partners = sorted(partners_set, key=_hr_no_sort_key)
         
         # === 조합 생성 (Axis - Challenger - Partner/Challenger) ===
         combos = set()
@@ -617,12 +667,12 @@ class QuantitativeAnalyzer:
         # 1. Axis - Challenger - Partner
         for chal in challengers:
             for part in partners:
-                c = sorted([axis[0], chal, part], key=lambda x: int(x) if x.isdigit() else 99)
+                c = sorted([axis[0], chal, part], key=_hr_no_sort_key)
                 combos.add("-".join(c))
                 
         # 2. Axis - Challenger1 - Challenger2 (상대마끼리 방어)
         if len(challengers) >= 2:
-            c = sorted([axis[0], challengers[0], challengers[1]], key=lambda x: int(x) if x.isdigit() else 99)
+            c = sorted([axis[0], challengers[0], challengers[1]], key=_hr_no_sort_key)
             combos.add("-".join(c))
             
         final_combos = sorted(list(combos))
@@ -1,16 +1,43 @@
 import os
 import json
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _loads(payload):
+    """JSON 파싱 (orjson 우선, NaN 등 orjson 미지원 표기가 든 이전 기록은 표준 json으로)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(payload)
+
 class StorageManager:
     """분석 결과 및 설정을 영구 저장하는 매니저"""
     
     BASE_DIR = os.path.join(os.path.dirname(__file__), "data", "history")
+    # 기록 목록 조회용 SQLite 색인 (JSON 파일은 원본 백업으로 유지)
+    INDEX_DB = os.path.join(os.path.dirname(__file__), "data", "history.db")
     ENV_FILE = os.path.join(os.path.dirname(__file__), ".env")
+    READ_WORKERS = 16  # 기록 파일 병렬 읽기 스레드 수
 
     @classmethod
-    def save_analysis(cls, date, meet, race_no, data):
-        """분석 결과를 날짜/지역별로 저장"""
+    def save_analysis(cls, date, meet, race_no, data, sync=False):
+        """
+        분석 결과를 날짜/지역별로 저장
+        
+        Args:
+            sync (bool): True면 디스크 기록(fsync)까지 대기
+        """
         # data/history/20240220/1/5.json
         target_dir = os.path.join(cls.BASE_DIR, date, str(meet))
         os.makedirs(target_dir, exist_ok=True)
@@ -20,59 +47,197 @@ class StorageManager:
         # 중복 방지를 위한 메타데이터 추가
         data["saved_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # orjson 사용 가능 시 고속 직렬화 (numpy 스칼라도 그대로 처리)
+        if orjson is not None:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        # 임시 파일에 쓴 뒤 교체 (쓰기 도중 중단돼도 기존 기록이 깨지지 않음)
+        cls._atomic_write(filepath, payload, sync=sync)
+        
+        # 색인 갱신 (실패 시 색인 파일 삭제 → 다음 로드 때 JSON 파일로 재구축)
+        try:
+            with closing(cls._connect()) as conn, conn:
+                cls._index_put(conn, date, meet, race_no, data["saved_at"], payload.decode("utf-8"))
+        except sqlite3.Error:
+            cls._drop_index()
         return filepath
 
     @classmethod
-    def load_all_history(cls):
-        """저장된 모든 분석 기록 로드"""
+    def load_all_history(cls, since=None, limit=None):
+        """
+        저장된 모든 분석 기록 로드 (최신순)
+        
+        Args:
+            since (datetime): 지정 시 이후 저장된 기록만
+            limit (int): 최대 건수
+        """
+        sql, params = "SELECT payload FROM history", []
+        if since is not None:
+            sql += " WHERE saved_at > ?"
+            params.append(since.strftime("%Y-%m-%d %H:%M:%S"))
+        sql += " ORDER BY saved_at DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        
+        try:
+            with closing(cls._connect()) as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except sqlite3.Error:
+            # 색인 사용 불가 → JSON 파일 전체 탐색
+            cls._drop_index()
+            history = cls._load_history_files()
+            if since is not None:
+                since_str = since.strftime("%Y-%m-%d %H:%M:%S")
+                history = [h for h in history if h.get("saved_at", "") > since_str]
+            return history[:limit] if limit else history
+        
         history = []
-        if not os.path.exists(cls.BASE_DIR):
-            return history
-
-        for date_dir in sorted(os.listdir(cls.BASE_DIR), reverse=True):
-            date_path = os.path.join(cls.BASE_DIR, date_dir)
-            if not os.path.isdir(date_path): continue
-            
-            for meet_dir in os.listdir(date_path):
-                meet_path = os.path.join(date_path, meet_dir)
-                if not os.path.isdir(meet_path): continue
-                
-                for filename in os.listdir(meet_path):
-                    if filename.endswith(".json"):
-                        try:
-                            with open(os.path.join(meet_path, filename), "r", encoding="utf-8") as f:
-                                item = json.load(f)
-                                history.append(item)
-                        except:
+        for (payload,) in rows:
+            try:
+                history.append(_loads(payload))
+            except ValueError:
+                continue
+        return history
+
+    # ─────────────────────────────────────────────
+    # 기록 색인 (SQLite)
+    # ─────────────────────────────────────────────
+    @classmethod
+    def _connect(cls):
+        """색인 DB 연결 (새로 만든 경우 기존 JSON 파일로 색인 구축)"""
+        is_new = not os.path.exists(cls.INDEX_DB)
+        os.makedirs(os.path.dirname(cls.INDEX_DB), exist_ok=True)
+        conn = sqlite3.connect(cls.INDEX_DB, timeout=10)
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS history ("
+                    "date TEXT, meet TEXT, race_no TEXT, saved_at TEXT, payload TEXT, "
+                    "PRIMARY KEY (date, meet, race_no))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_history_saved_at ON history (saved_at)")
+                if is_new:
+                    files = list(cls._iter_history_files())
+                    loaded = cls._read_history_files([path for *_, path in files])
+                    for (date_dir, meet_dir, filename, _), read in zip(files, loaded):
+                        if read is None:
                             continue
+                        payload, item = read
+                        cls._index_put(conn, date_dir, meet_dir, filename[:-len(".json")],
+                                       item.get("saved_at", ""), payload.decode("utf-8"))
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    @staticmethod
+    def _index_put(conn, date, meet, race_no, saved_at, payload):
+        conn.execute(
+            "INSERT OR REPLACE INTO history (date, meet, race_no, saved_at, payload) VALUES (?, ?, ?, ?, ?)",
+            (str(date), str(meet), str(race_no), saved_at, payload),
+        )
+
+    @classmethod
+    def _drop_index(cls):
+        try:
+            os.remove(cls.INDEX_DB)
+        except OSError:
+            pass
+
+    @classmethod
+    def _iter_history_files(cls):
+        """data/history/날짜/지역/경주.json 파일 목록 (date_dir, meet_dir, filename, path)"""
+        if not os.path.exists(cls.BASE_DIR):
+            return
+
+        # scandir의 DirEntry는 종류 정보를 갖고 있어 파일마다 stat 호출 불필요
+        with os.scandir(cls.BASE_DIR) as it:
+            date_entries = sorted((e for e in it if e.is_dir()), key=lambda e: e.name, reverse=True)
+        for date_entry in date_entries:
+            with os.scandir(date_entry.path) as it:
+                meet_entries = [e for e in it if e.is_dir()]
+            for meet_entry in meet_entries:
+                with os.scandir(meet_entry.path) as it:
+                    for entry in it:
+                        if entry.name.endswith(".json"):
+                            yield date_entry.name, meet_entry.name, entry.name, entry.path
+
+    @classmethod
+    def _read_history_files(cls, paths):
+        """기록 파일 병렬 읽기 → 경로 순서대로 (원문 bytes, 파싱 결과), 실패 시 None"""
+        def read(path):
+            try:
+                with open(path, "rb") as f:
+                    payload = f.read()
+                return payload, _loads(payload)
+            except (OSError, ValueError):
+                return None
+
+        if not paths:
+            return []
+        with ThreadPoolExecutor(max_workers=cls.READ_WORKERS) as ex:
+            return list(ex.map(read, paths))
+
+    @classmethod
+    def _load_history_files(cls):
+        """JSON 파일 전체를 읽어 최신순 정렬 (색인 사용 불가 시)"""
+        paths = [path for *_, path in cls._iter_history_files()]
+        history = [read[1] for read in cls._read_history_files(paths) if read is not None]
         # 최신순 정렬
         history.sort(key=lambda x: x.get("saved_at", ""), reverse=True)
         return history
 
+    @staticmethod
+    def _atomic_write(path, payload, sync=False):
+        """같은 폴더의 고유 임시 파일에 쓴 뒤 교체 (동시 저장끼리 임시 파일을 공유하지 않음)"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
     @classmethod
     def update_env(cls, key, value):
         """ .env 파일의 특정 키 값을 업데이트 """
+        cls.update_env_batch({key: value})
+
+    @classmethod
+    def update_env_batch(cls, updates):
+        """ .env 파일의 여러 키 값을 한 번의 쓰기로 업데이트 (주석/기타 줄 유지) """
         lines = []
         if os.path.exists(cls.ENV_FILE):
             with open(cls.ENV_FILE, "r", encoding="utf-8") as f:
                 lines = f.readlines()
         
         new_lines = []
-        found = False
+        pending = dict(updates)
         for line in lines:
-            if line.strip().startswith(f"{key}="):
-                new_lines.append(f"{key}={value}\n")
-                found = True
+            key = line.strip().split("=", 1)[0]
+            if "=" in line and key in updates:
+                new_lines.append(f"{key}={updates[key]}\n")
+                pending.pop(key, None)
             else:
                 new_lines.append(line)
         
-        if not found:
+        if new_lines and not new_lines[-1].endswith("\n"):
+            new_lines[-1] += "\n"
+        for key, value in pending.items():
             new_lines.append(f"{key}={value}\n")
-            
-        with open(cls.ENV_FILE, "w", encoding="utf-8") as f:
-            f.writelines(new_lines)
+        
+        # 임시 파일에 쓴 뒤 교체 (쓰기 도중 중단돼도 기존 .env가 깨지지 않음)
+        # (텍스트 모드 쓰기와 같은 줄바꿈 유지 — Windows에서는 CRLF)
+        cls._atomic_write(cls.ENV_FILE, "".join(new_lines).replace("\n", os.linesep).encode("utf-8"))
         
         # 메모리 상의 os.environ도 업데이트
-        os.environ[key] = value
+        os.environ.update(updates)